@@ -0,0 +1,267 @@
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from core.config import settings
+from services.file_service import assemble_chunked_upload, get_upload_compression, user_csv_path, UploadTooLargeError
+from interface.chunked_upload import ChunkedUploadInit, ChunkedUploadInfo, ChunkedUploadStatus
+from utils.constant import UPLOAD_DIR, CHUNKED_UPLOAD_DIR, CHUNKED_UPLOAD_DEFAULT_CHUNK_BYTES, CHUNKED_UPLOAD_MAX_CHUNK_BYTES
+from .state import _chunked_uploads
+from .upload import get_upload_session, check_lead_fields, complete_upload
+from contextlib import asynccontextmanager
+from datetime import datetime
+import asyncio
+import hashlib
+import math
+import os
+import shutil
+import uuid
+
+router = APIRouter(prefix="/upload/chunked", tags=["upload"])
+
+# Serializes storing a chunk with finalizing or aborting the same upload
+_upload_locks = {}
+
+def _upload_dir(info: ChunkedUploadInfo):
+    return os.path.join(UPLOAD_DIR, info.group_id, CHUNKED_UPLOAD_DIR, info.upload_id)
+
+def _chunk_path(info: ChunkedUploadInfo, index: int):
+    return os.path.join(_upload_dir(info), f"chunk_{index:06d}")
+
+def _received_chunks(info: ChunkedUploadInfo):
+    """Indexes of chunks stored completely on disk"""
+    if not os.path.isdir(_upload_dir(info)):
+        return []
+    received = []
+    for fname in os.listdir(_upload_dir(info)):
+        if fname.startswith("chunk_") and not fname.endswith(".part"):
+            index = int(fname[len("chunk_"):])
+            if index < info.total_chunks:
+                received.append(index)
+    return sorted(received)
+
+def _get_upload(upload_id: str):
+    info = _chunked_uploads.get(upload_id)
+    if not info:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return info
+
+@asynccontextmanager
+async def _locked_upload(upload_id: str):
+    """The upload record with its lock held; 404 if it was removed while waiting"""
+    info = _get_upload(upload_id)
+    async with _upload_locks.setdefault(upload_id, asyncio.Lock()):
+        if _chunked_uploads.get(upload_id) is not info:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+        yield info
+
+def _forget_upload(upload_id: str):
+    _chunked_uploads.pop(upload_id, None)
+    _upload_locks.pop(upload_id, None)
+
+def _check_not_finalizing(info: ChunkedUploadInfo):
+    if info.finalizing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is being finalized")
+
+def _status(info: ChunkedUploadInfo):
+    received = _received_chunks(info)
+    received_set = set(received)
+
+    # Collapse received indexes into inclusive ranges
+    ranges = []
+    for index in received:
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+
+    return ChunkedUploadStatus(
+        upload_id=info.upload_id,
+        chunk_size=info.chunk_size,
+        total_chunks=info.total_chunks,
+        received_bytes=sum(info.chunk_length(i) for i in received),
+        received_ranges=ranges,
+        missing_chunks=[i for i in range(info.total_chunks) if i not in received_set],
+        complete=len(received) == info.total_chunks
+    )
+
+@router.post("/", response_model=ChunkedUploadStatus, status_code=201)
+def initiate_upload(body: ChunkedUploadInit):
+    """
+    Start a resumable upload. Re-initiating with the same file (name and size)
+    returns the existing upload so a client can resume after a restart.
+    """
+    try:
+        get_upload_compression(body.filename)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    sess = get_upload_session(body.group_id, body.user_id)
+    check_lead_fields(sess, body.user_id, body.org_name, body.label)
+
+    if os.path.exists(user_csv_path(body.group_id, body.user_id)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You already uploaded a file to this group."
+        )
+
+    if body.total_size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the upload limit of {settings.UPLOAD_MAX_BYTES} bytes."
+        )
+
+    chunk_size = body.chunk_size or CHUNKED_UPLOAD_DEFAULT_CHUNK_BYTES
+    if not 0 < chunk_size <= CHUNKED_UPLOAD_MAX_CHUNK_BYTES:
+        raise HTTPException(400, f"Chunk size must be between 1 and {CHUNKED_UPLOAD_MAX_CHUNK_BYTES} bytes")
+
+    for info in _chunked_uploads.values():
+        if (info.group_id, info.user_id, info.filename, info.total_size, info.chunk_size) == \
+                (body.group_id, body.user_id, body.filename, body.total_size, chunk_size):
+            return _status(info)
+
+    now = datetime.now()
+    info = ChunkedUploadInfo(
+        upload_id=str(uuid.uuid4()),
+        group_id=body.group_id,
+        user_id=body.user_id,
+        filename=body.filename,
+        total_size=body.total_size,
+        chunk_size=chunk_size,
+        total_chunks=math.ceil(body.total_size / chunk_size),
+        sha256=body.sha256,
+        created_at=now,
+        updated_at=now
+    )
+    os.makedirs(_upload_dir(info), exist_ok=True)
+    _chunked_uploads[info.upload_id] = info
+
+    return _status(info)
+
+@router.put("/{upload_id}/chunks/{index}")
+async def upload_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: str = Header(...),
+):
+    """
+    Store one chunk from the raw request body. The body is streamed to disk and
+    only kept if its length and SHA-256 match; re-sending a chunk replaces it.
+    """
+    info = _get_upload(upload_id)
+    _check_not_finalizing(info)
+    if not 0 <= index < info.total_chunks:
+        raise HTTPException(400, f"Chunk index must be between 0 and {info.total_chunks - 1}")
+
+    expected_length = info.chunk_length(index)
+    chunk_path = _chunk_path(info, index)
+    part_path = f"{chunk_path}.{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    os.makedirs(_upload_dir(info), exist_ok=True)
+    try:
+        buffer = await run_in_threadpool(open, part_path, "wb")
+    except FileNotFoundError:
+        # The upload was finalized or aborted, and its folder removed, meanwhile
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is no longer accepting chunks")
+    try:
+        try:
+            async for data in request.stream():
+                size += len(data)
+                if size > expected_length:
+                    raise HTTPException(400, f"Chunk {index} is larger than {expected_length} bytes")
+                digest.update(data)
+                await run_in_threadpool(buffer.write, data)
+        finally:
+            await run_in_threadpool(buffer.close)
+
+        if size != expected_length:
+            raise HTTPException(400, f"Chunk {index} has {size} bytes, expected {expected_length}")
+        if digest.hexdigest() != x_chunk_sha256.lower():
+            raise HTTPException(400, f"Checksum mismatch for chunk {index}")
+
+        # Finalize and abort take the same lock, so the chunks cannot be
+        # assembled or removed between this check and the rename
+        async with _locked_upload(upload_id) as info:
+            _check_not_finalizing(info)
+            os.replace(part_path, chunk_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    info.updated_at = datetime.now()
+    return {"upload_id": upload_id, "index": index, "bytes": size}
+
+@router.get("/{upload_id}", response_model=ChunkedUploadStatus)
+def get_upload_status(upload_id: str):
+    """Report which chunks have been received so a client can resume"""
+    return _status(_get_upload(upload_id))
+
+@router.post("/{upload_id}/complete")
+async def finalize_upload(upload_id: str, background_tasks: BackgroundTasks):
+    """
+    Assemble all chunks into the user's CSV, then mark the upload and notify
+    the group exactly as a direct upload does.
+    """
+    async with _locked_upload(upload_id) as info:
+        _check_not_finalizing(info)
+        upload_status = _status(info)
+        if not upload_status.complete:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Missing chunks: {upload_status.missing_chunks}"
+            )
+
+        # Lead org_name & label were checked when the upload was initiated
+        sess = get_upload_session(info.group_id, info.user_id)
+
+        # Concurrent complete, abort and chunk requests get 409 until assembly ends
+        info.finalizing = True
+
+    chunk_paths = [_chunk_path(info, i) for i in range(info.total_chunks)]
+    try:
+        upload_info = await run_in_threadpool(
+            assemble_chunked_upload, info.group_id, info.user_id, chunk_paths, info.sha256,
+            get_upload_compression(info.filename)
+        )
+    except FileExistsError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You already uploaded a file to this group."
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    finally:
+        # On failure the upload is kept so the client can retry or abort it
+        info.finalizing = False
+
+    _forget_upload(upload_id)
+    await run_in_threadpool(shutil.rmtree, _upload_dir(info), True)
+
+    await complete_upload(sess, info.group_id, info.user_id, upload_info, background_tasks)
+
+    return {
+        "message": "File uploaded successfully",
+        "rows": upload_info["rows"],
+        "sha256": upload_info["sha256"]
+    }
+
+@router.delete("/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Discard a resumable upload and its stored chunks"""
+    async with _locked_upload(upload_id) as info:
+        _check_not_finalizing(info)
+        _forget_upload(upload_id)
+    await run_in_threadpool(shutil.rmtree, _upload_dir(info), True)
+    return {"message": "Upload aborted"}
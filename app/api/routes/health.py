@@ -5,6 +5,8 @@ import time
 from datetime import datetime, timezone
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
+from services.model_cache import model_cache
+from services.scoring_executor import scoring_executor
 
 router = APIRouter()
 
@@ -45,7 +47,9 @@ async def health_check() -> Dict[str, Any]:
                 "free_gb": round(disk.free / (1024**3), 2),
                 "used_percent": round((disk.used / disk.total) * 100, 2)
             }
-        }
+        },
+        "model_cache": model_cache.stats(),
+        "scoring_executor": scoring_executor.stats()
     }
     
     return health_data
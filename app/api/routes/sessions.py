@@ -1,24 +1,39 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from utils.constant import LOG_DIR, UPLOAD_DIR, MODEL_DIR
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, ValidationError
+from utils.constant import (
+    LOG_DIR, UPLOAD_DIR, MODEL_DIR,
+    DEFAULT_PREVIEW_HEAD_ROWS, DEFAULT_PREVIEW_TAIL_ROWS, DEFAULT_CHECKPOINT_EVERY,
+    PREDICT_STREAM_CHUNK_ROWS, PREDICT_STREAM_FORMATS, CHECKPOINT_DIR
+)
 from .state import _sessions
 from services.file_service import ensure_log_file_exists
+from utils.csv_cache import read_csv_header
+from utils.column_profile import load_column_profile
 from services.result_service import ResultService
 from services.prediction_service import PredictionService
+from services.model_cache import model_cache, ModelNotAvailableError
+from services.scoring_executor import scoring_executor, ScoringQueueFullError
+from services.predict_payload import parse_predict_payload, upload_media_type, UnsupportedPayloadError, PREDICT_MEDIA_TYPES
+from utils.model_format import session_model_path
 from interface.session_state import SessionState, SessionStateInfo, StateCheckRequest, StateCheckResponse
 from interface.identifier_config import IdentifierConfig, IdentifierMode
+from interface.prediction import PredictRequest, PredictResponse
 from datetime import datetime
-from typing import List, Dict
+from typing import Optional
+import asyncio
 import uuid
 import json
 import os
 import sys
 import subprocess
 import time
-import pickle
+import numpy as np
 import pandas as pd
-import io
+import shutil
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
@@ -34,14 +49,13 @@ class RunConfig(BaseModel):
     epochs: int = 1000
     label: str
     isLogging: bool = False
+    previewHead: int = DEFAULT_PREVIEW_HEAD_ROWS  # Joined rows shown from the start in verbose logs
+    previewTail: int = DEFAULT_PREVIEW_TAIL_ROWS  # Joined rows shown from the end in verbose logs
+    dumpJoinedData: bool = False  # Write the full joined table as a compressed artifact
+    checkpointEvery: int = DEFAULT_CHECKPOINT_EVERY  # Epochs between training checkpoints (opt-in), 0 disables them
+    warmStartSessionId: Optional[str] = None  # Start from this session's saved model (same features)
     identifierConfig: IdentifierConfig  # Now required
 
-class PredictRequest(BaseModel):
-    data: List[Dict[str, float]]
-
-class PredictResponse(BaseModel):
-    predictions: List[float]
-
 @router.post("/", status_code=201)
 def create_session(body: SessionCreate):
     sid = str(uuid.uuid4())
@@ -82,19 +96,19 @@ def get_common_columns(session_id: str):
     if not os.path.exists(session_dir):
         raise HTTPException(status_code=404, detail="Session upload folder not found")
     
-    # Analyze all CSV files
+    # Analyze all CSV files from their upload-time column profiles
     all_columns = {}
     user_columns = {}
     
     for user_id in sess.uploaded_users:
         csv_path = os.path.join(session_dir, f"{user_id}.csv")
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            columns = set(df.columns.tolist())
-            user_columns[user_id] = columns
+            profile = load_column_profile(csv_path)
+            user_columns[user_id] = {col_profile["name"] for col_profile in profile["columns"]}
             
             # Track column info
-            for col in columns:
+            for col_profile in profile["columns"]:
+                col = col_profile["name"]
                 if col not in all_columns:
                     all_columns[col] = {
                         "name": col,
@@ -105,12 +119,12 @@ def get_common_columns(session_id: str):
                     }
                 
                 all_columns[col]["present_in_users"].append(user_id)
-                all_columns[col]["unique_counts"][user_id] = df[col].nunique()
-                all_columns[col]["dtypes"][user_id] = str(df[col].dtype)
+                all_columns[col]["unique_counts"][user_id] = col_profile["distinct_approx"]
+                all_columns[col]["dtypes"][user_id] = col_profile["dtype"]
                 
                 # Add sample values from first user only
                 if len(all_columns[col]["sample_values"]) == 0:
-                    all_columns[col]["sample_values"] = df[col].dropna().head(3).tolist()
+                    all_columns[col]["sample_values"] = col_profile["sample_values"]
     
     # Find common columns (present in all users)
     common_columns = []
@@ -216,8 +230,10 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
     if user_id != sess.lead_user_id:
         raise HTTPException(403, "Only lead can initiate the run")
     
-    # Check session state
-    if sess.state != SessionState.READY:
+    # Check session state. A failed session can be started again, in which case
+    # the parties resume from their PSI and training checkpoints if checkpointEvery
+    # was set.
+    if sess.state not in [SessionState.READY, SessionState.FAILED]:
         if sess.state == SessionState.UPLOADING:
             raise HTTPException(400, "Not all users have uploaded their files yet")
         elif sess.state == SessionState.PROCESSING:
@@ -227,6 +243,16 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
         else:
             raise HTTPException(400, f"Cannot start processing in current state: {sess.state}")
     
+    # Validate the warm start model exists (session ids are UUIDs, never paths)
+    if body.warmStartSessionId:
+        try:
+            uuid.UUID(body.warmStartSessionId)
+        except ValueError:
+            raise HTTPException(400, "Invalid warm start session id")
+        warm_start_model = session_model_path(body.warmStartSessionId)
+        if not os.path.exists(warm_start_model):
+            raise HTTPException(400, f"No saved model found for warm start session {body.warmStartSessionId}")
+    
     # Validate identifier columns exist in all uploaded files
     session_dir = os.path.join(UPLOAD_DIR, session_id)
     if not os.path.exists(session_dir):
@@ -237,8 +263,7 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
     for user_id in sess.uploaded_users:
         csv_path = os.path.join(session_dir, f"{user_id}.csv")
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path, nrows=1)  # Just read header
-            all_columns_sets.append(set(df.columns))
+            all_columns_sets.append(set(read_csv_header(csv_path)))
     
     # Find intersection of all column sets
     common_cols = set.intersection(*all_columns_sets) if all_columns_sets else set()
@@ -254,8 +279,8 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
     for user_id in sess.uploaded_users:
         csv_path = os.path.join(session_dir, f"{user_id}.csv")
         if os.path.exists(csv_path):
-            df = pd.read_csv(csv_path, nrows=1)  # Just read header
-            missing_cols = [col for col in identifier_config.columns if col not in df.columns]
+            header = read_csv_header(csv_path)
+            missing_cols = [col for col in identifier_config.columns if col not in header]
             if missing_cols:
                 raise HTTPException(
                     400, 
@@ -266,6 +291,7 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
     sess.state = SessionState.PROCESSING
     sess.processing_started_at = datetime.now()
     sess.updated_at = datetime.now()
+    sess.error_message = None
 
     ensure_log_file_exists(session_id)
     
@@ -290,8 +316,7 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
         for fname in user_files:
             uid = fname.replace(".csv", "")
             csv_path = os.path.join(session_dir, fname)
-            df = pd.read_csv(csv_path, nrows=1)  # Just read header
-            if label in df.columns:
+            if label in read_csv_header(csv_path):
                 label_owner = uid
                 break
         
@@ -319,8 +344,7 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
         print(f"🎭 Party assignments for label '{label}':")
         for uid, pid in user_file_map.items():
             csv_path = os.path.join(session_dir, f"{uid}.csv")
-            df = pd.read_csv(csv_path, nrows=1)
-            has_label = label in df.columns
+            has_label = label in read_csv_header(csv_path)
             print(f"   Party {pid}: {uid} {'(HAS LABEL)' if has_label else ''}")
 
         num_parties = len(user_file_map)
@@ -345,11 +369,19 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
                 "-r", regression,
                 "--lr", lr,
                 "--epochs", epochs,
-                "--label", label
+                "--label", label,
+                "--checkpoint-every", str(body.checkpointEvery)
             ]
 
             if is_logging:
                 cmd.append("--verbose")
+                cmd.extend(["--preview-head", str(body.previewHead), "--preview-tail", str(body.previewTail)])
+
+            if body.dumpJoinedData:
+                cmd.append("--dump-joined")
+
+            if body.warmStartSessionId:
+                cmd.extend(["--warm-start", body.warmStartSessionId])
             
             # Add identifier config if it's not the default
             if identifier_config and (identifier_config.mode != IdentifierMode.SINGLE or 
@@ -385,6 +417,9 @@ async def proceed(session_id: str, background_tasks: BackgroundTasks, body: RunC
             sess.state = SessionState.COMPLETED
             sess.has_results = True
             sess.processing_completed_at = datetime.now()
+            # Only now is the model saved by party 0; until then every party's
+            # checkpoints are kept so a failed run can still resume
+            shutil.rmtree(os.path.join(session_dir, CHECKPOINT_DIR), ignore_errors=True)
         else:
             sess.state = SessionState.FAILED
             sess.error_message = "; ".join(error_messages)
@@ -417,7 +452,7 @@ def get_session_result(session_id: str):
 
 @router.get("/{session_id}/model/download")
 def download_model(session_id: str):
-    """Download the trained model pickle file for a session"""
+    """Download the trained model file for a session"""
     # Check if session exists
     if session_id not in _sessions:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -445,44 +480,66 @@ def download_model(session_id: str):
         media_type="application/octet-stream"
     )
 
-@router.post("/{session_id}/predict", response_model=PredictResponse)
-def predict(session_id: str, body: PredictRequest):
-    """Make predictions using the trained model for single or multiple data points"""
+def prediction_response(predictions, probabilities) -> PredictResponse:
+    # Round for consistency
+    return PredictResponse(
+        predictions=np.round(predictions, 4).tolist(),
+        probabilities=None if probabilities is None else np.round(probabilities, 4).tolist()
+    )
+
+# Request body schemas for the docs; the body itself is parsed by parse_predict_payload
+PREDICT_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        media_type: (
+            {"schema": PredictRequest.model_json_schema()} if media_type == "application/json"
+            else {"schema": {"type": "string", "format": "binary"}}
+        )
+        for media_type in PREDICT_MEDIA_TYPES
+    },
+}
+
+@router.post("/{session_id}/predict", response_model=PredictResponse,
+             openapi_extra={"requestBody": PREDICT_REQUEST_BODY})
+async def predict(session_id: str, request: Request):
+    """
+    Make predictions using the trained model for single or multiple data points.
+    The body is chosen by Content-Type: JSON rows ({"data": [...]}) or columns
+    ({"columns": {feature: [...]}}), an Arrow IPC stream/file, or a .npy array
+    with one column per model feature, in feature order.
+    """
     # Check if session exists
     if session_id not in _sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Check if results exist
-    result = ResultService.get_result(session_id)
-    if result is None:
-        raise HTTPException(status_code=404, detail="Model not available yet")
-    
-    # Check if model path exists
-    if not result.summary.modelPath:
-        raise HTTPException(status_code=404, detail="Model file not available")
-    
-    # Construct model path
-    model_path = os.path.join(MODEL_DIR, result.summary.modelPath)
-    
     try:
-        # Validate that all required features are present in each data point
-        with open(model_path, "rb") as f:
-            model_data = pickle.load(f)
-        
-        feature_names = model_data["feature_names"]
-        for data_point in body.data:
-            for feature in feature_names:
-                if feature not in data_point:
-                    raise ValueError(f"Missing required feature: {feature}")
+        # Loaded model from the process cache (reloaded if the file changed)
+        model_data = model_cache.get(session_id)
         
-        # Use PredictionService to make predictions
-        predictions = PredictionService.load_model_and_predict(model_path, body.data)
+        # Columnar and binary bodies decode straight to a feature matrix
+        body = await request.body()
+        data = await run_in_threadpool(
+            parse_predict_payload, request.headers.get("content-type"), body, model_data["feature_names"]
+        )
         
-        # Round predictions for consistency
-        predictions = [round(p, 4) for p in predictions]
+        # Score all data points at once (missing features raise ValueError);
+        # large requests run in the scoring process pool
+        predictions, probabilities = await scoring_executor.score(
+            len(data), PredictionService.predict_with_probabilities, model_data, data
+        )
         
-        return PredictResponse(predictions=predictions)
+        return prediction_response(predictions, probabilities)
         
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    except UnsupportedPayloadError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ScoringQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ModelNotAvailableError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model file not found")
     except ValueError as e:
@@ -492,57 +549,47 @@ def predict(session_id: str, body: PredictRequest):
 
 @router.post("/{session_id}/predict-batch", response_model=PredictResponse)
 async def predict_batch(session_id: str, file: UploadFile = File(...)):
-    """Make batch predictions using the trained model from a CSV file"""
+    """
+    Make batch predictions using the trained model from a CSV file, a .npy
+    array or an Arrow IPC file (.arrow/.feather) or stream (.arrows)
+    """
     # Check if session exists
     if session_id not in _sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Check if results exist
-    result = ResultService.get_result(session_id)
-    if result is None:
-        raise HTTPException(status_code=404, detail="Model not available yet")
-    
-    # Check if model path exists
-    if not result.summary.modelPath:
-        raise HTTPException(status_code=404, detail="Model file not available")
-    
-    # Construct model path
-    model_path = os.path.join(MODEL_DIR, result.summary.modelPath)
-    
     # Validate file type
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="File must be a CSV")
+    is_csv = file.filename.endswith('.csv')
+    media_type = None if is_csv else upload_media_type(file.filename)
+    if not is_csv and media_type is None:
+        raise HTTPException(
+            status_code=400, detail="File must be a CSV, .npy or Arrow IPC (.arrow, .feather, .arrows) file"
+        )
     
     try:
-        # Read CSV file
+        # Read the uploaded file
         contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # Load model to get feature names for validation
-        with open(model_path, "rb") as f:
-            model_data = pickle.load(f)
         
-        feature_names = model_data["feature_names"]
+        model_data = model_cache.get(session_id)
         
-        # Validate that all required features are present
-        for feature in feature_names:
-            if feature not in df.columns:
-                raise ValueError(f"Missing required feature in CSV: {feature}")
-        
-        # Convert DataFrame to list of dictionaries for PredictionService
-        data_points = []
-        for _, row in df.iterrows():
-            data_point = {feature: float(row[feature]) for feature in feature_names}
-            data_points.append(data_point)
-        
-        # Use PredictionService to make predictions
-        predictions = PredictionService.load_model_and_predict(model_path, data_points)
-        
-        # Round predictions for consistency
-        predictions = [round(p, 4) for p in predictions]
+        # Parse and score off the event loop; large files run in the scoring
+        # process pool. CSV is sized by line count, binary files decode to a
+        # feature matrix first.
+        if is_csv:
+            predictions, probabilities = await scoring_executor.score(
+                contents.count(b"\n"), PredictionService.predict_csv, model_data, contents
+            )
+        else:
+            X = await run_in_threadpool(parse_predict_payload, media_type, contents, model_data["feature_names"])
+            predictions, probabilities = await scoring_executor.score(
+                len(X), PredictionService.predict_with_probabilities, model_data, X
+            )
         
-        return PredictResponse(predictions=predictions)
+        return prediction_response(predictions, probabilities)
         
+    except ScoringQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ModelNotAvailableError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model file not found")
     except pd.errors.EmptyDataError:
@@ -551,3 +598,114 @@ async def predict_batch(session_id: str, file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _read_csv_header(upload) -> pd.Index:
+    """Column names of an uploaded CSV, leaving the file at its start"""
+    upload.seek(0)
+    header = pd.read_csv(upload, nrows=0).columns
+    upload.seek(0)
+    return header
+
+def _score_chunk(model_data: dict, chunk: pd.DataFrame, output_format: str, id_column: Optional[str], header: bool):
+    """Score and encode one parsed CSV chunk"""
+    predictions, probabilities = PredictionService.predict_with_probabilities(model_data, chunk)
+    out = pd.DataFrame({"row": chunk.index})
+    if id_column:
+        out[id_column] = chunk[id_column].to_numpy()
+    out["prediction"] = np.round(predictions, 4)
+    if probabilities is not None:
+        out["probability"] = np.round(probabilities, 4)
+    
+    if output_format == "csv":
+        return out.to_csv(index=False, header=header).encode("utf-8")
+    return out.to_json(orient="records", lines=True).encode("utf-8")
+
+@router.post("/{session_id}/predict-batch/stream")
+async def predict_batch_stream(
+    session_id: str,
+    file: UploadFile = File(...),
+    format: str = "ndjson",
+    id_column: Optional[str] = None,
+):
+    """
+    Score a CSV of any size and stream the results back chunk by chunk, as
+    NDJSON (default) or CSV rows of row index, optional id_column value,
+    prediction and (logistic) probability. Memory use is bounded by the chunk
+    size; the first rows are sent as soon as the first chunk is scored.
+    """
+    # Check if session exists
+    if session_id not in _sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Validate file type and output format
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="File must be a CSV")
+    if format not in PREDICT_STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(PREDICT_STREAM_FORMATS)}")
+    
+    try:
+        model_data = model_cache.get(session_id)
+    except ModelNotAvailableError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    
+    # Starlette has already spooled the upload, and FastAPI only closes it
+    # once the response (background task included) is done, so read it in place
+    try:
+        header = await run_in_threadpool(_read_csv_header, file.file)
+    except pd.errors.EmptyDataError:
+        raise HTTPException(status_code=400, detail="CSV file is empty")
+    
+    feature_names = model_data["feature_names"]
+    for feature in feature_names:
+        if feature not in header:
+            raise HTTPException(status_code=400, detail=f"Missing required feature in CSV: {feature}")
+    if id_column and id_column not in header:
+        raise HTTPException(status_code=400, detail=f"Column not found in CSV: {id_column}")
+    
+    usecols = set(feature_names) | ({id_column} if id_column else set())
+    reader = await run_in_threadpool(
+        pd.read_csv, file.file, usecols=list(usecols), chunksize=PREDICT_STREAM_CHUNK_ROWS
+    )
+    # Held while a threadpool thread parses from the reader, so cleanup
+    # never closes it underneath a read still in flight
+    reader_lock = asyncio.Lock()
+    closed = False
+    
+    async def cleanup():
+        # Runs from the generator and as a background task, whichever comes
+        # first; the generator never starts if the client disconnects early
+        nonlocal closed
+        async with reader_lock:
+            if not closed:
+                closed = True
+                reader.close()
+    
+    async def stream_results():
+        try:
+            first = True
+            while True:
+                try:
+                    async with reader_lock:
+                        chunk = None if closed else await run_in_threadpool(next, reader, None)
+                    if chunk is None:
+                        break
+                    # Large chunks are scored in the scoring process pool
+                    data = await scoring_executor.score(
+                        len(chunk), _score_chunk, model_data, chunk, format, id_column, first
+                    )
+                except (ValueError, ScoringQueueFullError) as e:
+                    # Headers are already sent; report the failure in-band and stop
+                    if format == "ndjson":
+                        yield (json.dumps({"error": str(e)}) + "\n").encode("utf-8")
+                        break
+                    raise
+                first = False
+                yield data
+        finally:
+            await cleanup()
+    
+    return StreamingResponse(
+        stream_results(), media_type=PREDICT_STREAM_FORMATS[format], background=BackgroundTask(cleanup)
+    )
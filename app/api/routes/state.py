@@ -1,9 +1,12 @@
 from typing import Dict, List
 from fastapi import WebSocket
 from interface.session_state import SessionStateInfo
+from interface.chunked_upload import ChunkedUploadInfo
 
 # shared state
 # In-memory store for demo; swap out for a real DB
 _sessions: Dict[str, SessionStateInfo] = {}
 # Structure: { group_id: [WebSocket, WebSocket, ...] }
-active_connections: Dict[str, List[WebSocket]] = {}
\ No newline at end of file
+active_connections: Dict[str, List[WebSocket]] = {}
+# Structure: { upload_id: ChunkedUploadInfo } for resumable uploads in progress
+_chunked_uploads: Dict[str, ChunkedUploadInfo] = {}
\ No newline at end of file
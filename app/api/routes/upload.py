@@ -1,5 +1,10 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
-from services.file_service import save_user_csv
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status
+from core.config import settings
+from services.file_service import (
+    CsvUploadWriter, receive_multipart_csv, get_upload_compression, user_csv_path, UploadTooLargeError
+)
+from utils.constant import UPLOAD_MULTIPART_OVERHEAD_BYTES
+from utils.object_store import link_derived_artifacts
 from .ws import active_connections
 from .state import _sessions
 from interface.session_state import SessionState
@@ -8,20 +13,8 @@ import json
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
-@router.post("/")
-async def upload_csv(
-    group_id: str = Form(...),
-    user_id:  str = Form(...),
-    org_name: str | None = Form(None),
-    label:    str | None = Form(None),
-    file:     UploadFile = File(...),
-):
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only CSV files are allowed."
-        )
-
+def get_upload_session(group_id: str, user_id: str):
+    """Return the session the user may upload to, or raise the matching HTTP error."""
     # Check if session exists
     sess = _sessions.get(group_id)
     if not sess:
@@ -43,41 +36,119 @@ async def upload_csv(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot upload files in current session state: {sess.state}"
         )
-    
+
+    return sess
+
+def check_lead_fields(sess, user_id: str, org_name: str | None, label: str | None):
+    # on the lead path, enforce that org_name & label are present
+    if sess.lead_user_id == user_id:
+        if not org_name or not label:
+            raise HTTPException(400, "Organization name & label required for lead")
+
+def build_derived_artifacts(sha256: str, file_path: str):
+    """Build (or reuse) the read caches of a stored CSV and link them next to it."""
     try:
-        # on the lead path, enforce that org_name & label are present
-        if sess.lead_user_id == user_id:
-            if not org_name or not label:
-                raise HTTPException(400, "Organization name & label required for lead")
-        
-        save_user_csv(group_id, user_id, file)
-        
-        # Track that this user has uploaded
-        sess.uploaded_users.add(user_id)
+        link_derived_artifacts(sha256, file_path)
+    except Exception as e:
+        print(f"⚠️ Could not build cache for {file_path}: {e}")
+
+async def complete_upload(sess, group_id: str, user_id: str, upload_info: dict, background_tasks: BackgroundTasks):
+    """Schedule the read caches of a stored CSV, mark the user as uploaded and notify the group."""
+    # Columnar cache and column profile are built once per file content and shared by
+    # sessions, after the response is sent; until they exist readers parse the CSV
+    background_tasks.add_task(build_derived_artifacts, upload_info["sha256"], upload_info["path"])
+    
+    # Track that this user has uploaded
+    sess.uploaded_users.add(user_id)
+    sess.updated_at = datetime.now()
+    
+    # Check if all users have uploaded
+    if len(sess.uploaded_users) == sess.participant_count:
+        sess.state = SessionState.READY
         sess.updated_at = datetime.now()
-        
-        # Check if all users have uploaded
-        if len(sess.uploaded_users) == sess.participant_count:
-            sess.state = SessionState.READY
-            sess.updated_at = datetime.now()
 
-        # Notify all clients in the group
-        if group_id in active_connections:
-            message = json.dumps({
-                "event": "file_uploaded",
-                "user_id": user_id,
-                "uploaded_count": len(sess.uploaded_users),
-                "participant_count": sess.participant_count,
-                "all_uploaded": len(sess.uploaded_users) == sess.participant_count,
-                "session_state": sess.state
-            })
-            for connection in active_connections[group_id]:
-                await connection.send_text(message)
+    # Notify all clients in the group
+    if group_id in active_connections:
+        message = json.dumps({
+            "event": "file_uploaded",
+            "user_id": user_id,
+            "uploaded_count": len(sess.uploaded_users),
+            "participant_count": sess.participant_count,
+            "all_uploaded": len(sess.uploaded_users) == sess.participant_count,
+            "session_state": sess.state
+        })
+        for connection in active_connections[group_id]:
+            await connection.send_text(message)
+
+# Form schema for the docs; the body is parsed by receive_multipart_csv
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {
+            "group_id": {"type": "string"},
+            "user_id": {"type": "string"},
+            "org_name": {"type": "string"},
+            "label": {"type": "string"},
+            "file": {"type": "string", "format": "binary"},
+        },
+        "required": ["group_id", "user_id", "file"],
+    }}},
+}
+
+@router.post("/", openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_csv(request: Request, background_tasks: BackgroundTasks):
+    """
+    Upload a user's CSV (.csv, .csv.gz or .csv.zst) as multipart form data.
+    The form fields must come before the file, which is validated and
+    written to disk while it is received.
+    """
+    # Reject early when the client announced a body that cannot fit
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and \
+            int(content_length) > settings.UPLOAD_MAX_BYTES + UPLOAD_MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the upload limit of {settings.UPLOAD_MAX_BYTES} bytes."
+        )
+
+    upload = {}
+
+    def start_upload(fields: dict, filename: str):
+        # Same checks as before the file was read, now run once its part begins
+        group_id, user_id = fields.get("group_id"), fields.get("user_id")
+        if not group_id or not user_id:
+            raise ValueError("Form fields group_id and user_id must come before the file.")
+        compression = get_upload_compression(filename)
+
+        sess = get_upload_session(group_id, user_id)
+        check_lead_fields(sess, user_id, fields.get("org_name"), fields.get("label"))
+        upload["sess"] = sess
+        return CsvUploadWriter(user_csv_path(group_id, user_id), compression=compression)
+
+    try:
+        upload_info, fields = await receive_multipart_csv(request, start_upload)
+        group_id, user_id = fields["group_id"], fields["user_id"]
+        await complete_upload(upload["sess"], group_id, user_id, upload_info, background_tasks)
 
     except FileExistsError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You already uploaded a file to this group."
         )
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
-    return {"message": "File uploaded successfully"}
+    return {
+        "message": "File uploaded successfully",
+        "rows": upload_info["rows"],
+        "sha256": upload_info["sha256"]
+    }
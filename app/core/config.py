@@ -50,4 +50,16 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str = "MPC for PPML"
 
+    # Largest accepted CSV upload, in bytes
+    UPLOAD_MAX_BYTES: int = 32 * 1024 * 1024 * 1024
+
+    # Trained models kept loaded in memory for the predict endpoints
+    MODEL_CACHE_SIZE: int = 64
+
+    # Prediction requests with at least SCORING_OFFLOAD_ROWS rows are scored in a
+    # pool of SCORING_WORKERS processes; SCORING_MAX_QUEUED more may wait for one
+    SCORING_WORKERS: int = 2
+    SCORING_OFFLOAD_ROWS: int = 20000
+    SCORING_MAX_QUEUED: int = 16
+
 settings = Settings()
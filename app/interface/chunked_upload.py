@@ -0,0 +1,46 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class ChunkedUploadInit(BaseModel):
+    """Request to start a resumable upload"""
+    group_id: str
+    user_id: str
+    org_name: Optional[str] = None
+    label: Optional[str] = None
+    filename: str
+    total_size: int = Field(gt=0)  # Size of the complete file in bytes
+    chunk_size: Optional[int] = None  # Defaults to the server chunk size
+    sha256: Optional[str] = None  # Checksum of the complete file as sent (compressed for .gz/.zst), verified on finalize
+
+
+class ChunkedUploadInfo(BaseModel):
+    """Server-side record of a resumable upload"""
+    upload_id: str
+    group_id: str
+    user_id: str
+    filename: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    sha256: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finalizing: bool = False  # Chunks are being assembled; no other changes allowed
+
+    def chunk_length(self, index: int) -> int:
+        """Expected byte length of a chunk (the last one may be shorter)"""
+        if index == self.total_chunks - 1:
+            return self.total_size - index * self.chunk_size
+        return self.chunk_size
+
+
+class ChunkedUploadStatus(BaseModel):
+    upload_id: str
+    chunk_size: int
+    total_chunks: int
+    received_bytes: int
+    received_ranges: List[List[int]]  # Inclusive [first, last] chunk index ranges
+    missing_chunks: List[int]
+    complete: bool
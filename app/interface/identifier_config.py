@@ -3,6 +3,8 @@
 from typing import List, Optional
 from pydantic import BaseModel
 from enum import Enum
+import numpy as np
+import pandas as pd
 
 
 class IdentifierMode(str, Enum):
@@ -32,4 +34,55 @@ class IdentifierConfig(BaseModel):
             return self.separator.join(parts)
             
         else:
-            raise ValueError(f"Unknown identifier mode: {self.mode}")
\ No newline at end of file
+            raise ValueError(f"Unknown identifier mode: {self.mode}")
+
+    def create_identifiers(self, df: pd.DataFrame, row_dtype=None) -> pd.Series:
+        """
+        Create identifiers for every row of a DataFrame at once.
+
+        Produces exactly the strings that create_identifier(row.to_dict()) gives
+        for each row of df.iterrows(): iterrows yields rows of df.values, so when
+        all columns share a numeric dtype the identifier columns are promoted to
+        it first (e.g. int ids become "5.0" next to float columns).
+
+        Args:
+            df: Input dataframe
+            row_dtype: dtype iterrows rows would have; defaults to the one of df
+                (pass it when df is a column projection of the original frame)
+
+        Returns:
+            String Series aligned with df.index
+        """
+        if self.mode == IdentifierMode.SINGLE:
+            if len(self.columns) != 1:
+                raise ValueError("Single mode requires exactly one column")
+        elif self.mode != IdentifierMode.COMBINED:
+            raise ValueError(f"Unknown identifier mode: {self.mode}")
+
+        if row_dtype is None:
+            # Interleaved dtype of df.values, computed without materializing it
+            row_dtype = df.iloc[:0].to_numpy().dtype
+
+        parts = [self._column_as_strings(df, col, row_dtype) for col in self.columns]
+
+        identifiers = parts[0]
+        for part in parts[1:]:
+            identifiers = np.char.add(np.char.add(identifiers, self.separator), part)
+
+        return pd.Series(identifiers, index=df.index, dtype=object)
+
+    @staticmethod
+    def _column_as_strings(df: pd.DataFrame, col: str, row_dtype) -> np.ndarray:
+        """Stringify one column the way str() does on the values of row.to_dict()."""
+        if col not in df.columns:
+            return np.full(len(df), "", dtype=str)
+
+        series = df[col]
+        if row_dtype != object:
+            values = series.to_numpy(dtype=row_dtype)
+        elif pd.api.types.is_extension_array_dtype(series.dtype):
+            # to_dict() boxes missing values of nullable dtypes as None
+            values = series.to_numpy(dtype=object, na_value=None)
+        else:
+            values = series.to_numpy(dtype=object)
+        return values.astype(str)
\ No newline at end of file
@@ -0,0 +1,22 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, model_validator
+
+
+class PredictRequest(BaseModel):
+    """
+    JSON prediction input, either row-oriented (data) or column-oriented
+    (columns, feature name -> values) which avoids one object per row
+    """
+    data: Optional[List[Dict[str, float]]] = None
+    columns: Optional[Dict[str, List[float]]] = None
+
+    @model_validator(mode="after")
+    def check_one_layout(self):
+        if (self.data is None) == (self.columns is None):
+            raise ValueError("Provide exactly one of 'data' (rows) or 'columns'")
+        return self
+
+
+class PredictResponse(BaseModel):
+    predictions: List[float]
+    probabilities: Optional[List[float]] = None  # P(y=1), logistic regression only
@@ -15,7 +15,7 @@ class Summary(BaseModel):
     f1: Optional[float] = None  # Optional for logistic regression
     epochs: int
     lr: float
-    modelPath: Optional[str] = None  # Path to saved model pickle file
+    modelPath: Optional[str] = None  # File name of the saved model in MODEL_DIR
     modelSize: Optional[str] = None  # Size of model file (e.g., "1.5 KB", "2.3 MB")
 
 class Config(BaseModel):
@@ -1,9 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from api.main import api_router
 from core.config import settings
+from services.scoring_executor import scoring_executor
 from utils.constant import ensure_all_directories_exist
 
 
@@ -13,8 +15,15 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 # Ensure all required directories exist on startup
 ensure_all_directories_exist()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the scoring worker processes with the server
+    scoring_executor.shutdown()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
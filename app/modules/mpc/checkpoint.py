@@ -0,0 +1,138 @@
+# modules/mpc/checkpoint.py
+
+import hashlib
+import json
+import os
+from mpyc.runtime import mpc
+from utils.cli_parser import print_log
+
+# Number of most recent epoch checkpoints kept per party
+CHECKPOINTS_KEPT = 2
+
+PSI_RESULT_FILE = "psi.json"
+
+def log(msg):
+    print_log(mpc.pid, msg)
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def fingerprint(obj):
+    """Stable SHA-256 fingerprint of a JSON-serializable object."""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+class TrainingCheckpoint:
+    """
+    Periodically persists this party's secret shares of the training state
+    (theta and, for logistic regression, the bias) and restores them on restart.
+
+    Shares are only meaningful together with the other parties' shares of the
+    same epoch, so restoring first agrees on the latest epoch that every party
+    has on disk.
+    """
+
+    def __init__(self, directory, every, signature):
+        """
+        Args:
+            directory: Per-party checkpoint directory
+            every: Save a checkpoint every N epochs (0 disables checkpointing)
+            signature: JSON-serializable description of the run (regression type,
+                learning rate, data fingerprint); checkpoints of other runs are ignored
+        """
+        self.directory = directory
+        self.every = every
+        self.signature = fingerprint(signature)
+        if self.every:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, epoch):
+        return os.path.join(self.directory, f"epoch_{epoch:06d}.json")
+
+    def _local_epochs(self):
+        epochs = []
+        for fname in os.listdir(self.directory):
+            if not (fname.startswith("epoch_") and fname.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, fname), "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # Unreadable or partially written checkpoint
+            if data.get("signature") == self.signature:
+                epochs.append(data["epoch"])
+        return sorted(epochs)
+
+    async def save(self, epoch, state):
+        """
+        Save the shares of `state` ({name: [secure values]}) if `epoch` is a
+        checkpoint epoch.
+        """
+        if not self.every or epoch % self.every != 0:
+            return
+
+        shares = {}
+        for name, values in state.items():
+            field_elements = await mpc.gather(values)
+            shares[name] = [int(s.value) for s in field_elements]
+
+        _write_json_atomic(self._path(epoch), {
+            "signature": self.signature,
+            "epoch": epoch,
+            "state": shares,
+        })
+
+        # Prune older checkpoints
+        for old_epoch in self._local_epochs()[:-CHECKPOINTS_KEPT]:
+            os.remove(self._path(old_epoch))
+
+    async def restore(self, secfx):
+        """
+        Agree with all parties on the latest common checkpoint and load it.
+        Must be called by every party when checkpointing is enabled.
+
+        Returns:
+            (epoch, state): epoch to resume from and {name: [secfx]} state,
+            or (0, None) if there is nothing to resume.
+        """
+        if not self.every:
+            return 0, None
+
+        all_epochs = await mpc.transfer(self._local_epochs(), senders=range(len(mpc.parties)))
+        common = set(all_epochs[0]).intersection(*all_epochs[1:])
+        if not common:
+            return 0, None
+
+        epoch = max(common)
+        with open(self._path(epoch), "r") as f:
+            data = json.load(f)
+
+        state = {
+            name: [secfx(secfx.field(v)) for v in values]
+            for name, values in data["state"].items()
+        }
+        return epoch, state
+
+def save_psi_result(directory, identifiers_fingerprint, intersection):
+    """Persist the PSI result together with the fingerprint of its inputs."""
+    os.makedirs(directory, exist_ok=True)
+    _write_json_atomic(os.path.join(directory, PSI_RESULT_FILE), {
+        "fingerprint": identifiers_fingerprint,
+        "intersection": intersection,
+    })
+
+def load_psi_result(directory, identifiers_fingerprint):
+    """Return a persisted PSI result if it was computed from the same inputs, else None."""
+    path = os.path.join(directory, PSI_RESULT_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != identifiers_fingerprint:
+        return None
+    return data["intersection"]
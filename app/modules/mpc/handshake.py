@@ -0,0 +1,59 @@
+# modules/mpc/handshake.py
+
+from mpyc.runtime import mpc
+from modules.mpc.transfer import transfer_arrays
+
+# Bump whenever the layout of the handshake message changes
+HANDSHAKE_VERSION = 2
+
+def build_handshake(feature_names, label_name, has_label, identifiers, normalizer_state=None):
+    """
+    Bundle everything a party has to announce before PSI into one message:
+    - schema: the local feature names and their fitted normalizer state
+    - label metadata: the detected label name and whether labels are present
+    - row count: number of local records after preprocessing
+    - PSI payload: the local identifier list
+    """
+    return {
+        "version": HANDSHAKE_VERSION,
+        "feature_names": list(feature_names),
+        "normalizer_state": normalizer_state,
+        "label_name": label_name,
+        "has_label": has_label,
+        "row_count": len(identifiers),
+        "identifiers": list(identifiers),
+    }
+
+async def exchange_handshake(message):
+    """
+    Broadcast the local handshake message in a single transfer round.
+
+    Returns:
+        List of handshake messages ordered by party id.
+
+    Raises:
+        ValueError: If a party sent a message with an unexpected version.
+    """
+    messages = await mpc.transfer(message, senders=range(len(mpc.parties)))
+
+    for pid, msg in enumerate(messages):
+        version = msg.get("version") if isinstance(msg, dict) else None
+        if version != HANDSHAKE_VERSION:
+            raise ValueError(
+                f"Party {pid} sent handshake version {version}, expected {HANDSHAKE_VERSION}"
+            )
+
+    return messages
+
+async def exchange_records(X_filtered, y_filtered):
+    """
+    Exchange the filtered feature blocks of all parties and the labels of
+    party 0 in a single transfer round, as raw array buffers.
+
+    Returns:
+        (X_joined, y_final): feature blocks ordered by party id and the label
+        vector of party 0 (None if party 0 has no labels).
+    """
+    payload = {"X": X_filtered, "y": y_filtered if mpc.pid == 0 else None}
+    messages = await transfer_arrays(payload)
+    return [msg["X"] for msg in messages], messages[0]["y"]
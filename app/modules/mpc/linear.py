@@ -9,19 +9,21 @@ def log(msg):
     print_log(mpc.pid, msg)
     
 class SecureLinearRegression:
-    def __init__(self, epochs=DEFAULT_EPOCHS, lr=DEFAULT_LR, is_logging=False):
+    def __init__(self, epochs=DEFAULT_EPOCHS, lr=DEFAULT_LR, is_logging=False, checkpoint=None):
         self.epochs = epochs
         self.lr = lr
         self.is_logging = is_logging
+        self.checkpoint = checkpoint  # Optional TrainingCheckpoint
         self.theta = None  # Model parameters
         self.secfx = mpc.SecFxp()
 
-    async def fit(self, X_parts, y_parts):
+    async def fit(self, X_parts, y_parts, initial_theta=None):
         """Securely train linear regression using gradient descent.
 
         Args:
             X_parts (List[List[List[secfx]]]): List of X matrices from parties (all combined).
             y_parts (List[List[secfx]]): List of y vectors from parties (all combined).
+            initial_theta (List[secfx], optional): Secret-shared starting weights (warm start).
         """
         
         # Concatenate data from all parties (already flattened)
@@ -32,15 +34,26 @@ class SecureLinearRegression:
 
         log(f"✅ Loaded {n_samples} samples, {n_features} features")
         
-        # Initialize theta (model weights) to zeros
-        theta = [self.secfx(0) for _ in range(n_features)]
+        # Initialize theta (model weights) to zeros, or to the warm start weights
+        if initial_theta is not None:
+            theta = list(initial_theta[:n_features])
+        else:
+            theta = [self.secfx(0) for _ in range(n_features)]
         lr_sec = self.secfx(self.lr)
 
+        # Resume from the latest checkpoint shared by all parties, if any
+        start_epoch = 0
+        if self.checkpoint:
+            start_epoch, state = await self.checkpoint.restore(self.secfx)
+            if state:
+                theta = state["theta"]
+                log(f"♻️ Resuming training from checkpoint at epoch {start_epoch}")
+
         log(f"🔎 Start learning with {self.epochs} iterations and learning rate {self.lr}")
         if not self.is_logging:
             log("🧮 Please wait, the training process is currently on progress...")
             
-        for epoch in range(self.epochs):
+        for epoch in range(start_epoch, self.epochs):
             # Compute predictions: y_pred = X @ theta
             y_pred = [sum(x_i[j] * theta[j] for j in range(n_features)) for x_i in X]
             
@@ -55,6 +68,10 @@ class SecureLinearRegression:
 
             # Update theta
             theta = [theta[j] - lr_sec * gradients[j] for j in range(n_features)]
+
+            # Persist this party's shares of theta periodically
+            if self.checkpoint:
+                await self.checkpoint.save(epoch + 1, {"theta": theta})
             
             # Memory cleanup every 10 epochs
             if epoch % 10 == 0:
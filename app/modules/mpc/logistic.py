@@ -9,10 +9,11 @@ def log(msg):
     print_log(mpc.pid, msg)
 
 class SecureLogisticRegression:
-    def __init__(self, epochs=DEFAULT_EPOCHS, lr=DEFAULT_LR, is_logging=False):
+    def __init__(self, epochs=DEFAULT_EPOCHS, lr=DEFAULT_LR, is_logging=False, checkpoint=None):
         self.epochs = epochs
         self.lr = lr
         self.is_logging = is_logging
+        self.checkpoint = checkpoint  # Optional TrainingCheckpoint
         self.theta = None  # Model parameters
         self.secfx = mpc.SecFxp()
         
@@ -37,12 +38,14 @@ class SecureLogisticRegression:
         x5 = x3 * x * x
         return const_05 + const_025 * x - (x3 / 48) + (x5 / 480)
 
-    async def fit(self, X_parts, y_parts):
+    async def fit(self, X_parts, y_parts, initial_theta=None):
         """Securely train logistic regression using gradient descent.
 
         Args:
             X_parts (List[List[List[secfx]]]): List of X matrices from parties (all combined).
             y_parts (List[List[secfx]]): List of y vectors from parties (all combined).
+            initial_theta (List[secfx], optional): Secret-shared starting weights followed
+                by the bias, in the layout of self.theta (warm start).
         """
         
         # Concatenate data from all parties (already flattened)
@@ -53,16 +56,29 @@ class SecureLogisticRegression:
 
         log(f"✅ Loaded {n_samples} samples, {n_features} features")
 
-        # Initialize theta (model weights) and bias to zeros
-        theta = [self.secfx(0) for _ in range(n_features)]
-        bias = self.secfx(0)
+        # Initialize theta (model weights) and bias to zeros, or to the warm start weights
+        if initial_theta is not None:
+            theta = list(initial_theta[:n_features])
+            bias = initial_theta[n_features]
+        else:
+            theta = [self.secfx(0) for _ in range(n_features)]
+            bias = self.secfx(0)
         lr_sec = self.secfx(self.lr)
 
+        # Resume from the latest checkpoint shared by all parties, if any
+        start_epoch = 0
+        if self.checkpoint:
+            start_epoch, state = await self.checkpoint.restore(self.secfx)
+            if state:
+                theta = state["theta"]
+                bias = state["bias"][0]
+                log(f"♻️ Resuming training from checkpoint at epoch {start_epoch}")
+
         log(f"🔎 Start logistic regression with {self.epochs} iterations and learning rate {self.lr}")
         if not self.is_logging:
             log("🧮 Please wait, the training process is currently on progress...")
              
-        for epoch in range(self.epochs):
+        for epoch in range(start_epoch, self.epochs):
             # Compute predictions: sigmoid(X @ theta)
             y_pred = [self.__approx_sigmoid__(sum(x_i[j] * theta[j] for j in range(n_features)) + bias) for x_i in X]
             
@@ -82,6 +98,10 @@ class SecureLogisticRegression:
             theta = [theta[j] - lr_sec * gradients[j] for j in range(n_features)]
             bias = bias - lr_sec * grad_bias
 
+            # Persist this party's shares of theta and bias periodically
+            if self.checkpoint:
+                await self.checkpoint.save(epoch + 1, {"theta": theta, "bias": [bias]})
+
             # Memory cleanup every 10 epochs
             if epoch % 10 == 0:
                 gc.collect()
@@ -0,0 +1,121 @@
+# modules/mpc/transfer.py
+
+import numpy as np
+from mpyc.runtime import mpc
+from utils.constant import TRANSFER_QUANTIZE, TRANSFER_COMPRESSION, TRANSFER_COMPRESSION_MIN_BYTES
+
+# Fixed-point formats: (wire dtype, fractional bits)
+QUANTIZE_FORMATS = {
+    "int32": ("<i4", 16),
+    "int64": ("<i8", 32),
+}
+
+def _get_codec(name):
+    """Return (compress, decompress) for a codec name, or None if it is unavailable."""
+    if name == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            return None
+        return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress
+    if name == "lz4":
+        try:
+            import lz4.frame
+        except ImportError:
+            return None
+        return lz4.frame.compress, lz4.frame.decompress
+    return None
+
+def pack_array(arr, quantize=TRANSFER_QUANTIZE, compression=TRANSFER_COMPRESSION,
+               min_compress_bytes=TRANSFER_COMPRESSION_MIN_BYTES):
+    """
+    Serialize a NumPy array as a small header plus one raw little-endian buffer,
+    so pickling it never creates per-element Python objects.
+
+    Args:
+        arr: Numeric array to send
+        quantize: Optional fixed-point format ("int32" or "int64") for float data
+        compression: Optional codec ("zstd" or "lz4") for blocks above min_compress_bytes
+        min_compress_bytes: Size threshold for compression
+
+    Returns:
+        dict with dtype/shape header and the raw payload bytes
+    """
+    arr = np.asarray(arr)
+    header = {
+        "kind": "ndarray",
+        "dtype": arr.dtype.newbyteorder("<").str,
+        "shape": arr.shape,
+        "scale": None,
+        "codec": None,
+    }
+    data = arr.astype(header["dtype"], copy=False)
+
+    if quantize and arr.dtype.kind == "f" and arr.size:
+        wire_dtype, frac_bits = QUANTIZE_FORMATS[quantize]
+        scale = float(1 << frac_bits)
+        limit = np.iinfo(wire_dtype).max / scale
+        # Fall back to lossless floats if values do not fit the fixed-point range
+        if np.all(np.isfinite(data)) and np.abs(data).max() < limit:
+            data = np.rint(data * scale).astype(wire_dtype)
+            header["scale"] = scale
+            header["wire_dtype"] = wire_dtype
+
+    payload = np.ascontiguousarray(data).tobytes()
+
+    if compression and len(payload) >= min_compress_bytes:
+        codec = _get_codec(compression)
+        if codec is not None:
+            compressed = codec[0](payload)
+            if len(compressed) < len(payload):
+                payload = compressed
+                header["codec"] = compression
+
+    header["data"] = payload
+    return header
+
+def unpack_array(packed):
+    """
+    Rebuild an array from pack_array output. Uncompressed, unquantized payloads
+    are viewed in place (read-only) rather than copied.
+    """
+    payload = packed["data"]
+    if packed["codec"]:
+        codec = _get_codec(packed["codec"])
+        if codec is None:
+            raise ValueError(f"Received '{packed['codec']}' compressed block but the codec is not installed")
+        payload = codec[1](payload)
+
+    if packed["scale"] is not None:
+        quantized = np.frombuffer(payload, dtype=packed["wire_dtype"])
+        arr = (quantized / packed["scale"]).astype(packed["dtype"], copy=False)
+    else:
+        arr = np.frombuffer(payload, dtype=packed["dtype"])
+
+    return arr.reshape(packed["shape"])
+
+async def transfer_arrays(payload, senders=None):
+    """
+    Drop-in for mpc.transfer on dicts of arrays: every ndarray value is packed
+    into a raw buffer before sending and unpacked on receipt. Other values
+    (including None) are sent as-is.
+
+    Returns:
+        List of received dicts ordered by sender.
+    """
+    if senders is None:
+        senders = range(len(mpc.parties))
+
+    packed = {
+        key: pack_array(value) if isinstance(value, np.ndarray) else value
+        for key, value in payload.items()
+    }
+    received = await mpc.transfer(packed, senders=senders)
+
+    return [
+        {
+            key: unpack_array(value) if isinstance(value, dict) and value.get("kind") == "ndarray" else value
+            for key, value in msg.items()
+        }
+        for msg in received
+    ]
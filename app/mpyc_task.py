@@ -5,23 +5,25 @@ import io
 import time
 import os
 import json
+import hashlib
+import numpy as np
 from mpyc.runtime import mpc
-from modules.mpc.linear import SecureLinearRegression
-from modules.mpc.logistic import SecureLogisticRegression
+from modules.mpc.handshake import build_handshake, exchange_handshake, exchange_records
+from modules.mpc.checkpoint import TrainingCheckpoint, fingerprint, save_psi_result, load_psi_result
 from modules.psi.multiparty_psi import run_n_party_psi
 from modules.psi.party import Party
 from utils.cli_parser import parse_cli_args, print_log
-from utils.data_loader import load_party_data_adapted
-from utils.data_normalizer import normalize_features
+from utils.data_loader import load_party_data_adapted, peak_rss_mb
+from utils.data_normalizer import normalize_features, merge_normalizer_states
+from utils.data_preview import print_dataset_preview, dump_dataset
+from utils.model_format import MODEL_SUFFIX, session_model_path, write_model
 from interface.identifier_config import IdentifierConfig
-from utils.visualization import plot_actual_vs_predicted, plot_logistic_evaluation_report
-from utils.constant import RESULT_DIR, UPLOAD_DIR, MODEL_DIR, STATIC_DIR
-from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, f1_score
+from utils.constant import RESULT_DIR, UPLOAD_DIR, MODEL_DIR, STATIC_DIR, CHECKPOINT_DIR
 import math
-import pickle
 
-# Ensure UTF-8 encoding
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# Heavy dependencies (scikit-learn, matplotlib via utils.visualization and the
+# regression module that is not used in this run) are imported lazily on the
+# code path and party role that needs them, to keep party startup fast.
 
 def log(msg):
     print_log(mpc.pid, msg)
@@ -33,6 +35,37 @@ def get_session_id_from_csv_path(csv_path):
         return path_parts[-2]
     return None
 
+def load_warm_start_theta(warm_start_session_id, regression_type, feature_names):
+    """
+    Load theta of a previously saved session model to start training from.
+    Returns None (and logs why) if the model is missing or incompatible with
+    this run's regression type and joined feature schema.
+    """
+    model_path = session_model_path(warm_start_session_id)
+    if not os.path.exists(model_path):
+        log(f"⚠️ Warm start model not found: {model_path}")
+        return None
+
+    # Only warm-started runs need the model loader (and its pandas import)
+    from services.prediction_service import PredictionService
+    model_data = PredictionService.load_model(model_path)
+
+    if model_data.get("regression_type") != regression_type:
+        log(f"⚠️ Warm start model is {model_data.get('regression_type')} regression, expected {regression_type}")
+        return None
+    if list(model_data.get("feature_names", [])) != list(feature_names):
+        log(f"⚠️ Warm start model features {model_data.get('feature_names')} do not match {feature_names}")
+        return None
+
+    # Linear: one weight per feature + bias column; logistic also keeps a separate bias
+    expected_length = len(feature_names) + (2 if regression_type == 'logistic' else 1)
+    theta = [float(t) for t in model_data["theta"]]
+    if len(theta) != expected_length:
+        log(f"⚠️ Warm start model has {len(theta)} weights, expected {expected_length}")
+        return None
+
+    return theta
+
 async def mpc_task():    
     args = parse_cli_args()
     csv_file = args["csv_file"]
@@ -43,9 +76,17 @@ async def mpc_task():
     preferred_label = args["label_name"]
     identifier_config_dict = args["identifier_config"]
     is_logging = args["is_logging"]
+    preview_head = args["preview_head"]
+    preview_tail = args["preview_tail"]
+    dump_joined = args["dump_joined"]
+    checkpoint_every = args["checkpoint_every"]
+    warm_start_session_id = args["warm_start_session_id"]
 
     party_id = mpc.pid
     session_id = get_session_id_from_csv_path(csv_file)
+    # Secret shares are per party id, so checkpoints are kept per party id.
+    # The API removes them once every party has exited successfully.
+    checkpoint_dir = os.path.join(os.path.dirname(csv_file), CHECKPOINT_DIR, f"party_{party_id}")
     
     # Initialize milestone tracking
     milestones = []
@@ -67,6 +108,10 @@ async def mpc_task():
         verbose=is_logging
     )
     
+    rss_mb = peak_rss_mb()
+    if rss_mb is not None:
+        log(f"📈 Peak RSS after loading data: {rss_mb:.1f} MB")
+    
     # Log label selection for debugging
     if party_id == 0:
         if preferred_label and label_name == preferred_label:
@@ -76,9 +121,10 @@ async def mpc_task():
         else:
             log(f"📋 Using detected label: '{label_name}'")
     
+    normalizer_state = None
     if normalizer_type:
         try:
-            X_local = normalize_features(X_local, method=normalizer_type)
+            X_local, normalizer_state = normalize_features(X_local, method=normalizer_type)
             log(f"✅ Applied '{normalizer_type}' normalization, Preprocessing done.")
         except ValueError as e:
             log(f"❌ Normalization error: {e}")
@@ -101,26 +147,36 @@ async def mpc_task():
     elif y_local is not None and party_id != 0:
         log("❗ Warning: Label provided but will be ignored")
         
-    # Send your local feature names to all other parties
-    feature_names_all = await mpc.transfer(feature_names, senders=range(len(mpc.parties)))
-    
-    # Broadcast label name (only Party 0 has it)
-    label_name_all = await mpc.transfer(label_name, senders=[0])
-    label_name = label_name_all[0] if label_name_all else "Label"
-
-    # Flatten in party order: assume feature_names_all[i] is from party i
-    joined_feature_names = []
-    for f_list in feature_names_all:
-        joined_feature_names.extend(f_list)
-
     # Step 1: Private Set Intersection (PSI) - Find common identifiers across all parties
-    # Step 1.1: Collect identifier lists from all parties
+    # Step 1.1: Exchange schema, label metadata, row counts and identifiers in one round
     log("🗂️ Collecting identifiers from all parties...")
-    gathered_identifiers = await mpc.transfer(identifiers, senders=range(len(mpc.parties)))
+    handshake = build_handshake(feature_names, label_name, y_local is not None, identifiers, normalizer_state)
+    try:
+        handshakes = await exchange_handshake(handshake)
+    except ValueError as e:
+        log(f"❌ Handshake error: {e}")
+        await mpc.shutdown()
+        return
 
-    # Step 1.2: Create Party instances for each list of identifiers
-    parties = [Party(party_id, ids) for party_id, ids in enumerate(gathered_identifiers)]
+    # Label name is taken from Party 0 only
+    label_name = handshakes[0]["label_name"] or "Label"
+
+    # Flatten in party order: handshakes[i] is from party i
+    joined_feature_names = []
+    for msg in handshakes:
+        joined_feature_names.extend(msg["feature_names"])
+
+    # Step 1.2: Create Party instances for each list of identifiers, unless a
+    # previous attempt already computed the intersection of the same identifiers
+    cached_intersection = None
+    if checkpoint_every:
+        identifiers_fingerprint = fingerprint([msg["identifiers"] for msg in handshakes])
+        cached_intersection = load_psi_result(checkpoint_dir, identifiers_fingerprint)
+    if cached_intersection is None:
+        parties = [Party(pid, msg["identifiers"]) for pid, msg in enumerate(handshakes)]
     log("✅ Received identifier lists from all parties.")
+    if is_logging:
+        log(f"📇 Records per party: {[msg['row_count'] for msg in handshakes]}")
     
     exchange_time = time.time() - start_time
     
@@ -132,7 +188,13 @@ async def mpc_task():
     
     # [3] Data Intersection
     start_time = time.time()
-    intersection = run_n_party_psi(parties)
+    if cached_intersection is not None:
+        intersection = cached_intersection
+        log("♻️ Reusing intersection from checkpoint.")
+    else:
+        intersection = run_n_party_psi(parties)
+        if checkpoint_every:
+            save_psi_result(checkpoint_dir, identifiers_fingerprint, intersection)
     elapsed_time = time.time() - start_time
     if is_logging:
         log(f"✅ Found intersected identifiers in {elapsed_time:.2f}s: {intersection}")
@@ -150,24 +212,22 @@ async def mpc_task():
 
     # Step 2.1: Create a mapping from identifier to index for filtering
     id_to_index = {identifier: idx for idx, identifier in enumerate(identifiers)}
-    intersecting_indices = [id_to_index[identifier] for identifier in intersection if identifier in id_to_index]
+    intersecting_indices = np.fromiter(
+        (id_to_index[identifier] for identifier in intersection if identifier in id_to_index),
+        dtype=np.intp
+    )
 
-    # Step 2.2: Filter local features and labels (if any)
-    X_filtered = [X_local[i] for i in intersecting_indices]
-    y_filtered = [y_local[i] for i in intersecting_indices] if y_local is not None else None
+    # Step 2.2: Filter local features and labels (if any) by row position
+    X_filtered = X_local[intersecting_indices]
+    y_filtered = y_local[intersecting_indices] if y_local is not None else None
 
     log(f"📦 Filtered {len(X_filtered)} records.")
 
-    # Step 2.3: Transfer X and y across all parties
-    X_joined = await mpc.transfer(X_filtered, senders=range(len(mpc.parties)))
-    y_final = await mpc.transfer(y_filtered, senders=[0])
-
-    # Step 2.4: Flatten and consolidate feature vectors
-    X_all = []
-    y_all = []
+    # Step 2.3: Transfer X and y across all parties in a single round
+    X_joined, y_final = await exchange_records(X_filtered, y_filtered)
 
     # Check if party 0 actually has labels
-    if y_final[0] is None:
+    if y_final is None:
         log("❌ Error: Party 0 must have the target label column!")
         log(f"   Expected label column: '{label_name}'")
         log(f"   Current party assignment: Party {party_id}")
@@ -175,12 +235,17 @@ async def mpc_task():
         await mpc.shutdown()
         return
 
-    for i in range(len(intersection)):
-        features = []
-        for party_features in X_joined:
-            features.extend(party_features[i])
-        X_all.append(features)
-        y_all.append(y_final[0][i])
+    # Step 2.4: Concatenate the party feature blocks column-wise, in party order.
+    # The last column is reserved for the bias coefficient.
+    n_records = len(y_final)
+    n_joined_features = sum(block.shape[1] for block in X_joined)
+    X_all = np.empty((n_records, n_joined_features + 1), dtype=np.float64)
+    col = 0
+    for block in X_joined:
+        X_all[:, col:col + block.shape[1]] = block
+        col += block.shape[1]
+    X_all[:, -1] = 1.0
+    y_all = np.asarray(y_final, dtype=np.float64)
 
     log("✅ Completed data join.")
     
@@ -194,60 +259,70 @@ async def mpc_task():
     label_name = label_name or "Label"  # fallback if somehow None
     all_headers = joined_feature_names + [label_name]
     if is_logging:
-        log("🧾 Final joined dataset (features + label):")
-        
-        # Combine features and label to determine column widths
-        all_rows = []
-        for features, label in zip(X_all, y_all):
-            row = list(map(str, features)) + [str(round(label, 2))]
-            all_rows.append(row)
-
-        # Calculate max width for each column
-        col_widths = []
-        for col_idx in range(len(all_headers)):
-            max_data_len = max(len(row[col_idx]) for row in all_rows)
-            header_len = len(all_headers[col_idx])
-            col_widths.append(max(max_data_len, header_len) + 2)
-
-        # Create header line
-        header = "idx".ljust(5) + "| " + " | ".join(
-            [all_headers[i].ljust(col_widths[i]) for i in range(len(all_headers))]
-        )
-        separator = "-" * len(header)
-
-        # Print header
-        print(header, flush=True)
-        print(separator, flush=True)
-
-        # Print data rows
-        for idx, row in enumerate(all_rows):
-            row_str = " | ".join(
-                [row[i].ljust(col_widths[i]) for i in range(len(row))]
-            )
-            print(str(idx).ljust(5) + "| " + row_str, flush=True)
+        log(f"🧾 Final joined dataset (features + label), first {preview_head} and last {preview_tail} rows:")
+        print_dataset_preview(all_headers, X_all[:, :-1], y_all, preview_head, preview_tail)
     
     else:
         log(f"🧾 Final joined features + label: {all_headers}")
 
+    # Write the full joined table only on explicit request, once (Party 0)
+    if dump_joined and party_id == 0:
+        dump_name = f"{session_id}_joined.csv.gz" if session_id else "joined.csv.gz"
+        dump_path = dump_dataset(os.path.join(RESULT_DIR, dump_name), all_headers, X_all[:, :-1], y_all)
+        log(f"💾 Full joined dataset written to {dump_path}")
+
     # At this point:
-    # X_all = [ [age, income, purchase_history, web_visits], ... ] for intersecting users
-    # y_all = [ purchase_amount, ... ] only from Org A
+    # X_all = float64 matrix, rows [age, income, purchase_history, web_visits, 1.0] for intersecting users
+    # y_all = float64 vector [ purchase_amount, ... ] only from Org A
 
     # Step 3: Do regression
-    # Step 3.1: Add bias coeff to X
-    X_all = [row + [1.0] for row in X_all]
+    # Step 3.1: Bias coeff is already the last column of X_all; the secure models
+    # work on Python scalars, so convert once at the training boundary
+    X_train = X_all.tolist()
+    y_train = y_all.tolist()
     
     # Step 3.2: Run the regression
     log(f"⚙️ Running {regression_type} regression on the data...")
     
     # [5] Federated Training
     start_time = time.time()
+
+    # Checkpoints are opt-in and only resumed for the same regression, learning rate and joined data
+    checkpoint = None
+    if checkpoint_every:
+        data_hash = hashlib.sha256(X_all.tobytes() + y_all.tobytes()).hexdigest()
+        checkpoint = TrainingCheckpoint(
+            checkpoint_dir,
+            checkpoint_every,
+            signature={"regression": regression_type, "lr": lr, "data": data_hash, "warm_start": warm_start_session_id}
+        )
+
     if regression_type == 'logistic':
-        model = SecureLogisticRegression(epochs=epochs, lr=lr, is_logging=is_logging)
+        from modules.mpc.logistic import SecureLogisticRegression
+        model = SecureLogisticRegression(epochs=epochs, lr=lr, is_logging=is_logging, checkpoint=checkpoint)
     else:
-        model = SecureLinearRegression(epochs=epochs, lr=lr, is_logging=is_logging)
+        from modules.mpc.linear import SecureLinearRegression
+        model = SecureLinearRegression(epochs=epochs, lr=lr, is_logging=is_logging, checkpoint=checkpoint)
+
+    # Warm start: Party 0 loads theta from an earlier session with the same feature
+    # schema, tells the others how many weights to expect and secret-shares them
+    initial_theta = None
+    if warm_start_session_id:
+        warm_theta = None
+        if party_id == 0:
+            warm_theta = load_warm_start_theta(warm_start_session_id, regression_type, joined_feature_names)
+        n_weights = (await mpc.transfer(len(warm_theta) if warm_theta else 0, senders=[0]))[0]
+        if n_weights:
+            if party_id == 0:
+                values = [model.secfx(t) for t in warm_theta]
+            else:
+                values = [model.secfx(None)] * n_weights
+            initial_theta = mpc.input(values, senders=0)
+            log(f"🔥 Warm-starting from the model of session {warm_start_session_id}")
+        else:
+            log("⚠️ Warm start model unavailable, starting from zeros")
     
-    await model.fit([X_all], [y_all])
+    await model.fit([X_train], [y_train], initial_theta=initial_theta)
     
     training_time = time.time() - start_time
     if party_id == 0:
@@ -256,7 +331,7 @@ async def mpc_task():
     # Step 4: Evaluation - predict the train data
     # [6] Model Evaluation
     start_time = time.time()
-    predictions = await model.predict([X_all][0])
+    predictions = await model.predict(X_train)
     
     # Save session-specific plots
     if session_id:
@@ -266,6 +341,8 @@ async def mpc_task():
         linear_plot_path = f"{STATIC_DIR}/linear_plot.png"
         logistic_plot_path = f"{STATIC_DIR}/logistic_roc.png"
     
+    from utils.visualization import plot_actual_vs_predicted, plot_logistic_evaluation_report
+
     auc_roc_data = None
     if regression_type == 'logistic':
         auc_roc_data = await plot_logistic_evaluation_report(y_all, predictions, mpc, is_logging, save_path=logistic_plot_path)
@@ -280,6 +357,8 @@ async def mpc_task():
     if party_id == 0:             
         # Save results for party 0 only
         if session_id:
+            from sklearn.metrics import mean_squared_error, r2_score, accuracy_score, f1_score
+
             # Calculate metrics
             accuracy = None
             f1 = None
@@ -315,8 +394,8 @@ async def mpc_task():
                 "type": "label"
             })
             
-            # Save the trained model as a pickle file
-            model_filename = f"{session_id}_model.pkl"
+            # Save the trained model as a compact model artifact
+            model_filename = f"{session_id}_model{MODEL_SUFFIX}"
             model_path = os.path.join(MODEL_DIR, model_filename)
             
             # Create a model dictionary with all necessary information
@@ -327,11 +406,16 @@ async def mpc_task():
                 "label_name": label_name,
                 "epochs": epochs,
                 "learning_rate": lr,
-                "normalizer": normalizer_type
+                "normalizer": normalizer_type,
+                # Per-feature scaling aligned with feature_names, re-applied at prediction time
+                "normalizer_state": merge_normalizer_states(
+                    [msg["normalizer_state"] for msg in handshakes],
+                    [len(msg["feature_names"]) for msg in handshakes],
+                    normalizer_type
+                ) if normalizer_type else None
             }
             
-            with open(model_path, "wb") as f:
-                pickle.dump(model_data, f)
+            write_model(model_path, model_data)
             log(f"✅ Model saved to {model_path}")
             
             # Get model file size
@@ -381,6 +465,10 @@ async def mpc_task():
     await mpc.shutdown()
     log("🛑 MPyC shutdown")
 
-# Use MPyC's loop-safe runner
-mpc.run(mpc_task())
-log("✅ MPyC task complete")
\ No newline at end of file
+if __name__ == "__main__":
+    # Ensure UTF-8 encoding
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    # Use MPyC's loop-safe runner
+    mpc.run(mpc_task())
+    log("✅ MPyC task complete")
\ No newline at end of file
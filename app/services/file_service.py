@@ -1,20 +1,341 @@
+import csv
+import hashlib
 import os
-import shutil
-from fastapi import UploadFile
-from utils.constant import LOG_DIR, UPLOAD_DIR
+import zlib
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from core.config import settings
+from utils.object_store import store_object
+from utils.constant import (
+    LOG_DIR, UPLOAD_DIR, UPLOAD_CHUNK_BYTES, UPLOAD_MAX_HEADER_BYTES, UPLOAD_DECOMPRESS_INPUT_BYTES,
+    UPLOAD_MAX_FORM_FIELD_BYTES
+)
 
-def save_user_csv(group_id: str, user_id: str, file: UploadFile):
-    group_path = os.path.join(UPLOAD_DIR, group_id)
-    os.makedirs(group_path, exist_ok=True)
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
 
-    file_path = os.path.join(group_path, f"{user_id}.csv")
+# Accepted upload file name suffixes and their compression
+UPLOAD_SUFFIXES = {".csv": None, ".csv.gz": "gzip", ".csv.zst": "zstd"}
 
-    if os.path.exists(file_path):
-        raise FileExistsError("File already exists for this user in the group.")
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+def get_upload_compression(filename: str):
+    """
+    Return the compression of an upload from its file name (None for plain CSV).
+
+    Raises:
+        ValueError: If the file is not a (compressed) CSV.
+    """
+    for suffix, compression in UPLOAD_SUFFIXES.items():
+        if filename.endswith(suffix):
+            return compression
+    raise ValueError(f"Only CSV files are allowed ({', '.join(UPLOAD_SUFFIXES)}).")
+
+class _StreamDecompressor:
+    """
+    Push-style decompression of gzip members or zstd frames (concatenated
+    ones included). Input is fed in small slices so a single call cannot
+    expand into an unbounded amount of memory.
+    """
+
+    def __init__(self, compression: str, sink):
+        if compression == "gzip":
+            self._new = lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("Zstandard-compressed uploads are not supported on this server.")
+            self._new = lambda: zstandard.ZstdDecompressor().decompressobj()
+        self.compression = compression
+        self.sink = sink
+        self._obj = self._new()
+        self._in_stream = False
+
+    def write(self, data: bytes):
+        for start in range(0, len(data), UPLOAD_DECOMPRESS_INPUT_BYTES):
+            piece = data[start:start + UPLOAD_DECOMPRESS_INPUT_BYTES]
+            while piece:
+                self._in_stream = True
+                try:
+                    out = self._obj.decompress(piece)
+                except Exception as e:
+                    raise ValueError(f"Invalid {self.compression} data: {e}")
+                if out:
+                    self.sink(out)
+                if self._obj.eof:
+                    # Anything left belongs to the next member/frame
+                    piece = self._obj.unused_data
+                    self._obj = self._new()
+                    self._in_stream = False
+                else:
+                    piece = b""
+
+    def close(self):
+        if self._in_stream:
+            raise ValueError(f"Compressed upload is truncated ({self.compression} stream did not end).")
+
+def _parse_csv_header(head: bytes):
+    """Validate and parse the header line from the first bytes of a CSV upload."""
+    try:
+        first_line = head.split(b"\n", 1)[0].decode("utf-8-sig").rstrip("\r")
+    except UnicodeDecodeError:
+        raise ValueError("CSV file must be UTF-8 encoded.")
+
+    columns = next(csv.reader([first_line]), [])
+    if not any(col.strip() for col in columns):
+        raise ValueError("CSV file has an empty header row.")
+
+    duplicates = sorted({col for col in columns if columns.count(col) > 1})
+    if duplicates:
+        raise ValueError(f"CSV header has duplicate columns: {duplicates}")
+
+    return columns
+
+def user_csv_path(group_id: str, user_id: str):
+    return os.path.join(UPLOAD_DIR, group_id, f"{user_id}.csv")
+
+class CsvUploadWriter:
+    """
+    Incrementally writes an uploaded CSV to a .part file next to its final
+    path, decompressing gzip/zstd input on the fly. While bytes are written
+    the header is validated, rows are counted (newline based, approximate for
+    quoted multi-line fields) and SHA-256 digests of the received bytes and
+    of the CSV content are computed. On commit() the file is stored in the
+    content-addressed object store and linked to its final path. The size
+    limit applies to both received and decompressed bytes.
+
+    Methods block on disk I/O; call them from the threadpool in async code.
+    """
+
+    def __init__(self, file_path: str, max_bytes: int = None, compression: str = None):
+        self.file_path = file_path
+        self.part_path = file_path + ".part"
+        self.max_bytes = settings.UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if os.path.exists(file_path):
+            raise FileExistsError("File already exists for this user in the group.")
+
+        self.digest = hashlib.sha256()
+        self.upload_digest = hashlib.sha256() if compression else self.digest
+        self.upload_size = 0
+        self.decompressor = _StreamDecompressor(compression, self._write_csv) if compression else None
+        self.size = 0
+        self.newlines = 0
+        self.last_byte = b""
+        self.head = b""
+        self.columns = None
+        self.buffer = open(self.part_path, "wb")
+
+    def write(self, chunk: bytes):
+        """Write received (possibly compressed) bytes"""
+        self.upload_size += len(chunk)
+        if self.decompressor is None:
+            self._write_csv(chunk)
+            return
+
+        if self.upload_size > self.max_bytes:
+            raise UploadTooLargeError(f"File exceeds the upload limit of {self.max_bytes} bytes.")
+        self.upload_digest.update(chunk)
+        self.decompressor.write(chunk)
+
+    def _write_csv(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"File exceeds the upload limit of {self.max_bytes} bytes.")
+
+        if self.columns is None:
+            self.head += chunk
+            if b"\n" in self.head:
+                self.columns = _parse_csv_header(self.head)
+                self.head = b""
+            elif len(self.head) > UPLOAD_MAX_HEADER_BYTES:
+                raise ValueError("CSV header row is too long.")
+
+        self.digest.update(chunk)
+        self.newlines += chunk.count(b"\n")
+        if chunk:
+            self.last_byte = chunk[-1:]
+        self.buffer.write(chunk)
+
+    def commit(self, expected_sha256: str = None):
+        """
+        Finish the file and move it into place. expected_sha256 is checked
+        against the received bytes (the compressed file for .gz/.zst uploads).
+
+        Returns:
+            Dictionary with path, size in bytes, row count, columns, sha256 of
+            the CSV content and upload_sha256 of the received bytes.
+        """
+        if self.decompressor is not None:
+            self.decompressor.close()
+        self.buffer.close()
+
+        if self.columns is None:
+            # Header-only file without a trailing newline (or an empty file)
+            self.columns = _parse_csv_header(self.head)
+
+        upload_sha256 = self.upload_digest.hexdigest()
+        if expected_sha256 and upload_sha256 != expected_sha256.lower():
+            raise ValueError(f"Checksum mismatch: expected {expected_sha256}, got {upload_sha256}")
+
+        sha256 = self.digest.hexdigest()
+        store_object(self.part_path, sha256, self.file_path)
+
+        # Lines after the header; a last line without a trailing newline still counts
+        rows = self.newlines + (1 if self.last_byte and self.last_byte != b"\n" else 0) - 1
+
+        return {
+            "path": self.file_path,
+            "bytes": self.size,
+            "rows": max(rows, 0),
+            "columns": self.columns,
+            "sha256": sha256,
+            "upload_bytes": self.upload_size,
+            "upload_sha256": upload_sha256,
+        }
+
+    def abort(self):
+        self.buffer.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+class _MultipartEvents:
+    """Collects the parser callbacks of one multipart body between stream reads"""
+
+    def __init__(self):
+        self.events = []
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        self.events.append(("begin", name, None if filename is None else filename.decode("utf-8", "replace")))
+
+    def on_part_data(self, data, start, end):
+        self.events.append(("data", data[start:end]))
+
+    def on_part_end(self):
+        self.events.append(("end",))
+
+async def receive_multipart_csv(request: Request, start_upload, file_field: str = "file"):
+    """
+    Parse a multipart/form-data upload straight from the request stream, so
+    the CSV is validated and written by a CsvUploadWriter as it arrives
+    instead of after the whole body has been spooled to disk.
+
+    Text fields must precede the file part. When the file part begins,
+    start_upload(fields, filename) is called from the threadpool with the
+    fields received so far; it validates them and returns the writer.
+
+    Returns:
+        (upload_info, fields): the result of CsvUploadWriter.commit() and the text fields.
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds the writer's size limit.
+        ValueError: If the form or the CSV is invalid.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    if b"boundary" not in params:
+        raise ValueError("Upload must be multipart/form-data.")
+
+    events = _MultipartEvents()
+    parser = multipart.MultipartParser(params[b"boundary"], {
+        name: getattr(events, name) for name in (
+            "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+            "on_headers_finished", "on_part_data", "on_part_end",
+        )
+    })
+    fields, field_bytes = {}, 0
+    part = None  # (name, filename) of the part being received
+    writer = None
+    file_received = False
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except multipart.exceptions.FormParserError as e:
+                raise ValueError(f"Invalid multipart data: {e}")
+
+            for event in events.events:
+                if event[0] == "begin":
+                    part = event[1:]
+                    if part[1] is None:
+                        fields[part[0]] = b""
+                    elif part[0] != file_field:
+                        raise ValueError(f"Unexpected file field '{part[0]}', upload the CSV as '{file_field}'.")
+                    elif writer is not None:
+                        raise ValueError("Only one file may be uploaded.")
+                    else:
+                        writer = await run_in_threadpool(start_upload, fields, part[1])
+                elif event[0] == "data":
+                    if part[1] is None:
+                        field_bytes += len(event[1])
+                        if field_bytes > UPLOAD_MAX_FORM_FIELD_BYTES:
+                            raise ValueError("Form fields are too large.")
+                        fields[part[0]] += event[1]
+                    else:
+                        await run_in_threadpool(writer.write, event[1])
+                elif part[1] is None:
+                    fields[part[0]] = fields[part[0]].decode("utf-8", "replace")
+                else:
+                    file_received = True
+            events.events.clear()
+
+        parser.finalize()
+        if not file_received:
+            raise ValueError(f"No file uploaded in the '{file_field}' field.")
+        # Committed only once the whole body has been parsed
+        upload_info = await run_in_threadpool(writer.commit)
+        writer = None
+        return upload_info, fields
+    except BaseException:
+        if writer is not None:
+            await run_in_threadpool(writer.abort)
+        raise
+
+def assemble_chunked_upload(group_id: str, user_id: str, chunk_paths, expected_sha256: str = None,
+                            compression: str = None):
+    """
+    Concatenate the chunk files of a resumable upload into the user's CSV,
+    with the same validation as a direct upload. Blocking; run in the threadpool.
+
+    Returns:
+        Dictionary with path, size in bytes, row count, columns and sha256.
+    """
+    writer = CsvUploadWriter(user_csv_path(group_id, user_id), compression=compression)
+    try:
+        for chunk_path in chunk_paths:
+            with open(chunk_path, "rb") as f:
+                while chunk := f.read(UPLOAD_CHUNK_BYTES):
+                    writer.write(chunk)
+        return writer.commit(expected_sha256)
+    except BaseException:
+        writer.abort()
+        raise
 
 def ensure_log_file_exists(session_id: str):
     session_log_dir = os.path.join(LOG_DIR, session_id)
-    os.makedirs(session_log_dir, exist_ok=True)
\ No newline at end of file
+    os.makedirs(session_log_dir, exist_ok=True)
@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict
+from core.config import settings
+from services.prediction_service import PredictionService
+from services.result_service import ResultService
+from utils.constant import MODEL_DIR, RESULT_DIR
+
+class ModelNotAvailableError(LookupError):
+    """The session has no result or no saved model yet"""
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+class ModelCache:
+    """
+    Process-wide LRU of loaded models keyed by session id.
+
+    An entry is served while the session's result JSON and model file keep
+    their size and mtime, so a retrained or replaced model is reloaded on
+    the next request. Hits cost two stat calls instead of parsing the
+    result and unpickling the model.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # session_id -> (result stamp, model stamp, model_data, model_path)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def get(self, session_id: str) -> dict:
+        """
+        Return the model data of a session.
+
+        Raises:
+            ModelNotAvailableError: No result or no model path recorded yet
+            FileNotFoundError: The recorded model file is missing
+        """
+        result_file = os.path.join(RESULT_DIR, f"{session_id}.json")
+        try:
+            result_stamp = _stamp(result_file)
+        except FileNotFoundError:
+            self.invalidate(session_id)
+            raise ModelNotAvailableError("Model not available yet")
+
+        with self._lock:
+            entry = self._entries.get(session_id)
+        if entry is not None and entry[0] == result_stamp:
+            try:
+                model_stamp = _stamp(entry[3])
+            except FileNotFoundError:
+                model_stamp = None
+            if entry[1] == model_stamp:
+                with self._lock:
+                    self.hits += 1
+                    if session_id in self._entries:
+                        self._entries.move_to_end(session_id)
+                return entry[2]
+
+        model_data, model_path, model_stamp = self._load(session_id)
+        with self._lock:
+            self.misses += 1
+            if entry is not None:
+                self.reloads += 1
+            self._entries[session_id] = (result_stamp, model_stamp, model_data, model_path)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return model_data
+
+    def _load(self, session_id: str):
+        result = ResultService.get_result(session_id)
+        if result is None:
+            raise ModelNotAvailableError("Model not available yet")
+        if not result.summary.modelPath:
+            raise ModelNotAvailableError("Model file not available")
+
+        model_path = os.path.join(MODEL_DIR, result.summary.modelPath)
+        # Stamp before loading, so a write racing the load is picked up next time
+        model_stamp = _stamp(model_path)
+        return PredictionService.load_model(model_path), model_path, model_stamp
+
+    def invalidate(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / requests, 4) if requests else None,
+            }
+
+model_cache = ModelCache(settings.MODEL_CACHE_SIZE)
@@ -0,0 +1,121 @@
+import io
+import os
+from typing import List, Union
+import numpy as np
+from interface.prediction import PredictRequest
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow input is optional
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+NPY_MEDIA_TYPE = "application/x-npy"
+NPY_MAGIC = b"\x93NUMPY"
+PREDICT_MEDIA_TYPES = (JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE, NPY_MEDIA_TYPE)
+# Binary batch uploads, by file extension
+UPLOAD_MEDIA_TYPES = {
+    ".npy": NPY_MEDIA_TYPE,
+    ".arrow": ARROW_FILE_MEDIA_TYPE,
+    ".feather": ARROW_FILE_MEDIA_TYPE,
+    ".arrows": ARROW_STREAM_MEDIA_TYPE,
+}
+# Booleans, integers and floats; anything else is not silently cast to float64
+NUMERIC_DTYPE_KINDS = "biuf"
+
+class UnsupportedPayloadError(ValueError):
+    """The Content-Type is not an accepted prediction input"""
+
+def _stack_features(columns, feature_names: List[str]) -> np.ndarray:
+    """float64 matrix of the named columns, in feature_names order"""
+    for feature in feature_names:
+        if feature not in columns:
+            raise ValueError(f"Missing required feature: {feature}")
+    if not feature_names:
+        return np.empty((0, 0))
+
+    arrays = [np.asarray(columns[feature], dtype=np.float64) for feature in feature_names]
+    if len({len(array) for array in arrays}) > 1:
+        raise ValueError("All feature columns must have the same length")
+    return np.column_stack(arrays)
+
+def _check_finite(X: np.ndarray) -> np.ndarray:
+    if not np.isfinite(X).all():
+        raise ValueError("Feature values must be finite numbers")
+    return X
+
+def _read_npy(body: bytes, feature_names: List[str]) -> np.ndarray:
+    if not body.startswith(NPY_MAGIC):
+        # np.load would otherwise try, and refuse, to unpickle it
+        raise ValueError("Invalid application/x-npy payload: not a .npy array")
+    array = np.load(io.BytesIO(body), allow_pickle=False)
+    if array.dtype.names:
+        # Structured array: one named field per feature, one record per row
+        if array.ndim != 1:
+            raise ValueError(f"Expected a 1-D structured array, got shape {array.shape}")
+        for feature in feature_names:
+            if feature in array.dtype.names and array.dtype[feature].kind not in NUMERIC_DTYPE_KINDS:
+                raise ValueError(f"Feature {feature} must be numeric, got dtype {array.dtype[feature]}")
+        return _stack_features({name: array[name] for name in array.dtype.names}, feature_names)
+    if array.dtype.kind not in NUMERIC_DTYPE_KINDS:
+        raise ValueError(f"Expected a numeric array, got dtype {array.dtype}")
+    if array.ndim != 2 or array.shape[1] != len(feature_names):
+        raise ValueError(
+            f"Expected a 2-D array with {len(feature_names)} columns in feature order, got shape {array.shape}"
+        )
+    return np.asarray(array, dtype=np.float64)
+
+def _read_arrow(body: bytes, media_type: str, feature_names: List[str]) -> np.ndarray:
+    if pa is None:
+        raise UnsupportedPayloadError("Arrow input requires pyarrow on the server")
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        table = pa.ipc.open_stream(body).read_all()
+    else:
+        table = pa.ipc.open_file(pa.BufferReader(body)).read_all()
+    columns = {name: table.column(name).to_numpy() for name in feature_names if name in table.column_names}
+    return _stack_features(columns, feature_names)
+
+def upload_media_type(filename: str):
+    """Media type of a binary batch upload from its extension, None if unsupported"""
+    return UPLOAD_MEDIA_TYPES.get(os.path.splitext(filename or "")[1].lower())
+
+def parse_predict_payload(content_type: str, body: bytes,
+                          feature_names: List[str]) -> Union[List[dict], np.ndarray]:
+    """
+    Decode a prediction request body by Content-Type:
+    - application/json: {"data": [rows]} or {"columns": {feature: [values]}}
+    - application/vnd.apache.arrow.stream / .file: Arrow IPC table with the feature columns
+    - application/x-npy: 2-D array in feature_names order, or a structured array
+
+    Returns:
+        The row dicts of a row-oriented JSON body, otherwise a float64
+        matrix in feature_names order
+
+    Raises:
+        UnsupportedPayloadError: Unknown Content-Type
+        pydantic.ValidationError: Invalid JSON body
+        ValueError: Malformed or incomplete binary input
+    """
+    media_type = (content_type or JSON_MEDIA_TYPE).split(";")[0].strip().lower()
+
+    if media_type == JSON_MEDIA_TYPE:
+        request = PredictRequest.model_validate_json(body)
+        if request.data is not None:
+            return request.data
+        return _check_finite(_stack_features(request.columns, feature_names))
+
+    try:
+        if media_type == NPY_MEDIA_TYPE:
+            X = _read_npy(body, feature_names)
+        elif media_type in (ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE):
+            X = _read_arrow(body, media_type, feature_names)
+        else:
+            raise UnsupportedPayloadError(
+                f"Unsupported Content-Type '{media_type}', use one of: {', '.join(PREDICT_MEDIA_TYPES)}"
+            )
+    except OSError as e:
+        # Arrow and NumPy report truncated or corrupt buffers as OSError
+        raise ValueError(f"Invalid {media_type} payload: {e}")
+    return _check_finite(X)
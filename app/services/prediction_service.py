@@ -1,91 +1,129 @@
+import io
 import pickle
 import os
-from typing import List, Dict
-import math
+from operator import itemgetter
+from typing import List, Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from utils.data_normalizer import apply_normalizer
+from utils.model_format import read_model
 
 class PredictionService:
     """Service for making predictions using trained MPC models outside of MPC runtime"""
     
     @staticmethod
-    def sigmoid(x: float) -> float:
-        """Standard sigmoid function"""
-        return 1 / (1 + math.exp(-x))
-    
-    @staticmethod
-    def predict_linear(theta: List[float], features: List[float]) -> float:
+    def load_model(model_path: str) -> Dict:
         """
-        Linear regression prediction: y = X @ theta
-        Matches the logic in SecureLinearRegression.predict()
+        Load the model data saved by a training run: a compact model artifact
+        (theta memory-mapped) or a legacy pickle written by older versions
         """
-        if len(features) != len(theta):
-            raise ValueError(f"Feature dimension mismatch: got {len(features)}, expected {len(theta)}")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
         
-        # Compute dot product
-        prediction = sum(features[i] * theta[i] for i in range(len(theta)))
-        return prediction
+        model_data = read_model(model_path)
+        if model_data is not None:
+            return model_data
+        
+        with open(model_path, "rb") as f:
+            return pickle.load(f)
     
     @staticmethod
-    def predict_logistic(theta: List[float], features: List[float]) -> float:
+    def load_model_and_predict(model_path: str, data_points: List[Dict[str, float]]) -> List[float]:
+        """Load a trained model and make predictions on multiple data points"""
+        return PredictionService.predict(PredictionService.load_model(model_path), data_points)
+    
+    @staticmethod
+    def stable_sigmoid(z: np.ndarray) -> np.ndarray:
+        """Vectorized sigmoid that never overflows: exp is only taken of -|z|"""
+        e = np.exp(-np.abs(z))
+        return np.where(z >= 0, 1 / (1 + e), e / (1 + e))
+    
+    @staticmethod
+    def feature_matrix(model_data: Dict,
+                       data: Union[pd.DataFrame, np.ndarray, List[Dict[str, float]]]) -> np.ndarray:
         """
-        Logistic regression prediction: binary classification based on sigmoid(X @ theta)
-        Matches the logic in SecureLogisticRegression.predict()
-        Note: In the MPC version, bias is included as the last element of theta
-        Returns: 0 or 1 (binary prediction)
+        Build the float64 feature matrix in the model's feature_names order,
+        scaled with the training normalizer when the model has one.
+        Accepts a DataFrame, a 2-D array already in feature_names order,
+        or a list of {feature: value} dicts.
         """
-        if len(features) != len(theta):
-            raise ValueError(f"Feature dimension mismatch: got {len(features)}, expected {len(theta)}")
-        
-        # Compute dot product
-        dot_product = sum(features[i] * theta[i] for i in range(len(theta)))
+        feature_names = model_data["feature_names"]
         
-        # Apply sigmoid
-        probability = PredictionService.sigmoid(dot_product)
+        if isinstance(data, np.ndarray):
+            if data.ndim != 2 or data.shape[1] != len(feature_names):
+                raise ValueError(
+                    f"Expected {len(feature_names)} feature columns, got array of shape {data.shape}"
+                )
+            # Copied, the normalizer scales in place
+            X = np.array(data, dtype=np.float64)
+        elif isinstance(data, pd.DataFrame):
+            missing = [feature for feature in feature_names if feature not in data.columns]
+            if missing:
+                raise ValueError(f"Missing required feature: {missing[0]}")
+            X = data[feature_names].to_numpy(dtype=np.float64)
+        elif feature_names:
+            getter = itemgetter(*feature_names)
+            try:
+                rows = [getter(data_point) for data_point in data]
+            except KeyError as e:
+                raise ValueError(f"Missing required feature: {e.args[0]}")
+            X = np.array(rows, dtype=np.float64).reshape(len(rows), len(feature_names))
+        else:
+            X = np.empty((len(data), 0))
         
-        # Convert to binary prediction (0 or 1)
-        return 1 if probability >= 0.5 else 0
+        # Scaling fitted during training; absent in models saved without normalization
+        normalizer_state = model_data.get("normalizer_state")
+        if normalizer_state:
+            apply_normalizer(X, normalizer_state)
+        return X
     
     @staticmethod
-    def load_model_and_predict(model_path: str, data_points: List[Dict[str, float]]) -> List[float]:
+    def score(model_data: Dict, X: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
         """
-        Load a trained model and make predictions on multiple data points
+        Score a feature matrix in one vectorized pass.
         Handles different theta structures for linear vs logistic regression
-        """
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Model file not found: {model_path}")
         
-        # Load model data
-        with open(model_path, "rb") as f:
-            model_data = pickle.load(f)
+        Returns:
+            (predictions, probabilities): linear regression values and no
+            probabilities, or logistic 0/1 classes and P(y=1)
+        """
+        theta = np.asarray(model_data["theta"], dtype=np.float64)
+        n_features = X.shape[1]
         
-        theta = model_data["theta"]
-        regression_type = model_data["regression_type"]
-        feature_names = model_data["feature_names"]
+        if model_data["regression_type"] == "linear":
+            # Linear regression: full theta, bias last
+            if len(theta) != n_features + 1:
+                raise ValueError(f"Linear regression dimension mismatch: got {n_features + 1} features + bias, expected {len(theta)} theta values")
+            return X @ theta[:n_features] + theta[n_features], None
         
-        predictions = []
+        # Logistic regression: theta includes both feature weights and bias,
+        # only the first n_features + 1 values are used
+        expected_theta_length = n_features + 1
+        if len(theta) < expected_theta_length:
+            raise ValueError(f"Logistic regression dimension mismatch: got {n_features} features, theta has {len(theta)} values, expected at least {expected_theta_length}")
+        probabilities = PredictionService.stable_sigmoid(X @ theta[:n_features] + theta[n_features])
+        return (probabilities >= 0.5).astype(np.float64), probabilities
+    
+    @staticmethod
+    def predict_with_probabilities(model_data: Dict,
+                                   data: Union[pd.DataFrame, np.ndarray, List[Dict[str, float]]]):
+        """Predictions and (logistic only) probabilities for a DataFrame, feature matrix or list of data points"""
+        return PredictionService.score(model_data, PredictionService.feature_matrix(model_data, data))
+    
+    @staticmethod
+    def predict_csv(model_data: Dict, contents: bytes) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Parse an uploaded CSV and score it, returning predictions and probabilities"""
+        df = pd.read_csv(io.BytesIO(contents))
         
-        for data_point in data_points:
-            # Extract features in the correct order
-            features = [data_point[feature] for feature in feature_names]
-            
-            if regression_type == "linear":
-                # Linear regression: add bias term and use full theta
-                features.append(1.0)
-                if len(features) != len(theta):
-                    raise ValueError(f"Linear regression dimension mismatch: got {len(features)} features + bias, expected {len(theta)} theta values")
-                prediction = PredictionService.predict_linear(theta, features)
-                
-            else:  # logistic
-                # Logistic regression: theta includes both feature weights and bias
-                expected_theta_length = len(features) + 1  # features + bias
-                
-                if len(theta) >= expected_theta_length:
-                    # Use only the needed theta values
-                    features.append(1.0)
-                    used_theta = theta[:expected_theta_length]
-                    prediction = PredictionService.predict_logistic(used_theta, features)
-                else:
-                    raise ValueError(f"Logistic regression dimension mismatch: got {len(features)} features, theta has {len(theta)} values, expected at least {expected_theta_length}")
-            
-            predictions.append(prediction)
+        # Validate that all required features are present
+        for feature in model_data["feature_names"]:
+            if feature not in df.columns:
+                raise ValueError(f"Missing required feature in CSV: {feature}")
         
-        return predictions
\ No newline at end of file
+        return PredictionService.predict_with_probabilities(model_data, df)
+    
+    @staticmethod
+    def predict(model_data: Dict, data_points: Union[pd.DataFrame, List[Dict[str, float]]]) -> List[float]:
+        """Make predictions with loaded model data on multiple data points"""
+        predictions, _ = PredictionService.predict_with_probabilities(model_data, data_points)
+        return predictions.tolist()
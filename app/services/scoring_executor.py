@@ -0,0 +1,110 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi.concurrency import run_in_threadpool
+from core.config import settings
+
+class ScoringQueueFullError(RuntimeError):
+    """Too many large scoring requests are already waiting for a worker"""
+
+class ScoringExecutor:
+    """
+    Runs scoring jobs so bulk requests do not starve interactive endpoints.
+
+    Jobs below offload_rows run in the regular threadpool. Larger jobs go to
+    a dedicated process pool, at most one per worker at a time. Up to
+    max_queued more wait for a free worker and any beyond that are
+    rejected. Job functions and arguments must be picklable.
+    """
+
+    def __init__(self, workers: int, offload_rows: int, max_queued: int):
+        self.workers = workers
+        self.offload_rows = offload_rows
+        self.max_queued = max_queued
+        self._pool = None
+        self._semaphore = asyncio.Semaphore(workers)
+        self.running = 0
+        self.queued = 0
+        self.inline_jobs = 0
+        self.offloaded_jobs = 0
+        self.failed_jobs = 0
+        self.rejected_jobs = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers do not inherit the server's threads and sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def score(self, rows: int, fn, *args):
+        """Run fn(*args) inline or in the process pool, depending on the row count."""
+        if rows < self.offload_rows:
+            self.inline_jobs += 1
+            return await run_in_threadpool(fn, *args)
+
+        if self.queued >= self.max_queued:
+            self.rejected_jobs += 1
+            raise ScoringQueueFullError("Scoring queue is full, retry later")
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.running += 1
+        pool = self._get_pool()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(pool, fn, *args)
+            self.offloaded_jobs += 1
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next job,
+            # unless another failed job already replaced this one
+            self.failed_jobs += 1
+            if self._pool is pool:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        except Exception:
+            self.failed_jobs += 1
+            raise
+        finally:
+            self.running -= 1
+            self.total_run_seconds += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        finished = self.offloaded_jobs + self.failed_jobs
+        return {
+            "workers": self.workers,
+            "offload_rows": self.offload_rows,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "queued": self.queued,
+            "inline_jobs": self.inline_jobs,
+            "offloaded_jobs": self.offloaded_jobs,
+            "failed_jobs": self.failed_jobs,
+            "rejected_jobs": self.rejected_jobs,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 2) if finished else None,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 2) if finished else None,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+scoring_executor = ScoringExecutor(
+    settings.SCORING_WORKERS, settings.SCORING_OFFLOAD_ROWS, settings.SCORING_MAX_QUEUED
+)
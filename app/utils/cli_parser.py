@@ -2,6 +2,7 @@
 
 import sys
 import json
+from utils.constant import DEFAULT_PREVIEW_HEAD_ROWS, DEFAULT_PREVIEW_TAIL_ROWS, DEFAULT_CHECKPOINT_EVERY
 
 def print_log(ids, msg):
     print(f"[Party {ids}] {msg}", flush=True)
@@ -10,13 +11,14 @@ def print_usage_and_exit():
     print(f"Usage: python mpyc_task.py [MPyC options] <dataset.csv>", end=" ")
     print("[--regression-type|--r] [linear|logistic]", end=" ")
     print("[--lr] <learning_rate> [--epochs] <num_epochs>", end=" ")
-    print("[--normalizer|--n] [minmax|zscore] [--label] <label_name>", end=" ")
-    print("[--identifier-config] <json_config> [--help|-h]")
+    print("[--normalizer|--n] [minmax|zscore|robust] [--label] <label_name>", end=" ")
+    print("[--identifier-config] <json_config> [--preview-head] <rows> [--preview-tail] <rows>", end=" ")
+    print("[--dump-joined] [--checkpoint-every] <epochs> [--warm-start] <session_id> [--help|-h]")
 
     print("\nArguments:")
     print("  [MPyC options]     : Optional, like -M (number of parties) or -I (party id)")
     print("  <dataset.csv>      : Path to the local party's CSV file")
-    print("  --normalizer -n    : Choose normalization method: 'minmax' or 'zscore', default to none")
+    print("  --normalizer -n    : Choose normalization method: 'minmax', 'zscore' or 'robust', default to none")
     print("  --regression -r    : Choose regression method: 'linear' or 'logistic', default to 'linear'")
     print("  --lr               : Learning rate for training (float), optional")
     print("  --epochs           : Number of epochs for training (int), optional")
@@ -24,6 +26,11 @@ def print_usage_and_exit():
     print("  --identifier-config: JSON string for identifier configuration, e.g.")
     print("                       '{\"mode\": \"single\", \"columns\": [\"user_id\"]}'")
     print("                       '{\"mode\": \"combined\", \"columns\": [\"user_id\", \"date\"], \"separator\": \"_\"}'")
+    print(f"  --preview-head     : Rows from the start of the joined dataset shown in verbose mode, default to {DEFAULT_PREVIEW_HEAD_ROWS}")
+    print(f"  --preview-tail     : Rows from the end of the joined dataset shown in verbose mode, default to {DEFAULT_PREVIEW_TAIL_ROWS}")
+    print("  --dump-joined      : Write the full joined dataset to a gzip-compressed CSV (Party 0 only)")
+    print(f"  --checkpoint-every : Save training checkpoints every N epochs (0 disables), default to {DEFAULT_CHECKPOINT_EVERY} (off)")
+    print("  --warm-start       : Session id whose saved model initialises theta (same features required)")
     print("  --help -h          : Show this help message and exit")
 
     print("\nExample:")
@@ -49,6 +56,10 @@ def parse_cli_args():
     label_name = None
     identifier_config = None
     is_logging = '--verbose' in sys.argv or '--debug' in sys.argv
+    dump_joined = '--dump-joined' in sys.argv
+    preview_head = DEFAULT_PREVIEW_HEAD_ROWS
+    preview_tail = DEFAULT_PREVIEW_TAIL_ROWS
+    checkpoint_every = DEFAULT_CHECKPOINT_EVERY
 
     # Extract CSV file
     for arg in sys.argv[1:]:
@@ -74,6 +85,10 @@ def parse_cli_args():
     epochs_str = get_arg_value(['--epochs'])
     label_name = get_arg_value(['--label'])
     identifier_config_str = get_arg_value(['--identifier-config'])
+    preview_head_str = get_arg_value(['--preview-head'])
+    preview_tail_str = get_arg_value(['--preview-tail'])
+    checkpoint_every_str = get_arg_value(['--checkpoint-every'])
+    warm_start_session_id = get_arg_value(['--warm-start'])
 
     # Convert and validate lr and epochs
     if lr_str:
@@ -90,6 +105,22 @@ def parse_cli_args():
             print("❌ Invalid number of epochs. Must be an integer.\n")
             print_usage_and_exit()
     
+    try:
+        if preview_head_str:
+            preview_head = int(preview_head_str)
+        if preview_tail_str:
+            preview_tail = int(preview_tail_str)
+    except ValueError:
+        print("❌ Invalid preview size. Must be an integer.\n")
+        print_usage_and_exit()
+
+    if checkpoint_every_str:
+        try:
+            checkpoint_every = int(checkpoint_every_str)
+        except ValueError:
+            print("❌ Invalid checkpoint interval. Must be an integer.\n")
+            print_usage_and_exit()
+
     # Parse identifier config if provided
     if identifier_config_str:
         try:
@@ -106,5 +137,10 @@ def parse_cli_args():
         "epochs": epochs,
         "label_name": label_name,
         "identifier_config": identifier_config,
-        "is_logging": is_logging
+        "is_logging": is_logging,
+        "preview_head": preview_head,
+        "preview_tail": preview_tail,
+        "dump_joined": dump_joined,
+        "checkpoint_every": checkpoint_every,
+        "warm_start_session_id": warm_start_session_id
     }
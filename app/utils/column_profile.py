@@ -0,0 +1,140 @@
+# utils/column_profile.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from utils.csv_cache import iter_csv_batches, load_csv_meta, merge_dtype, read_csv_header, source_stamp, temp_path
+
+PROFILE_FORMAT_VERSION = 1
+PROFILE_BATCH_ROWS = 65536
+PROFILE_SAMPLE_VALUES = 3
+
+class HyperLogLog:
+    """
+    Mergeable distinct-count sketch over pandas values (HLL with linear
+    counting for small cardinalities). Relative error is about 1.04 / sqrt(2**p).
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @staticmethod
+    def _bit_length(x):
+        # Exact vectorized bit length of uint64 values
+        x = x.copy()
+        n = np.zeros(x.shape, dtype=np.uint8)
+        for shift in (32, 16, 8, 4, 2, 1):
+            high = x >= (np.uint64(1) << np.uint64(shift))
+            n[high] += shift
+            x[high] >>= np.uint64(shift)
+        return n + x.astype(np.uint8)
+
+    def add(self, values):
+        """Add the non-null values of a Series."""
+        values = values.dropna()
+        if values.empty:
+            return
+
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        tail_bits = 64 - self.p
+        index = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        rank = (tail_bits + 1 - self._bit_length(tail)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            return int(round(self.m * np.log(self.m / zeros)))
+        return int(round(raw))
+
+def profile_path(csv_path):
+    return f"{os.path.splitext(csv_path)[0]}.profile.json"
+
+def _to_json_scalar(value):
+    value = value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+def build_column_profile(csv_path):
+    """
+    Profile every column of an uploaded CSV in one streaming pass and store it
+    next to the file as {name}.profile.json:
+    dtype, null ratio, approximate distinct count, min/max (numeric) and samples.
+
+    Returns:
+        The profile dictionary.
+    """
+    meta = load_csv_meta(csv_path)
+    stats = {
+        col: {"dtype": None, "nulls": 0, "min": None, "max": None, "samples": [], "hll": HyperLogLog()}
+        for col in read_csv_header(csv_path)
+    }
+    rows = 0
+
+    for batch in iter_csv_batches(csv_path, batch_rows=PROFILE_BATCH_ROWS):
+        rows += len(batch)
+        for col in batch.columns:
+            series = batch[col]
+            col_stats = stats[col]
+            col_stats["dtype"] = merge_dtype(col_stats["dtype"], series.dtype)
+            col_stats["nulls"] += int(series.isna().sum())
+            col_stats["hll"].add(series)
+
+            if len(col_stats["samples"]) < PROFILE_SAMPLE_VALUES:
+                needed = PROFILE_SAMPLE_VALUES - len(col_stats["samples"])
+                col_stats["samples"].extend(series.dropna().head(needed).tolist())
+
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) \
+                    and series.notna().any():
+                low, high = series.min(), series.max()
+                col_stats["min"] = low if col_stats["min"] is None else min(col_stats["min"], low)
+                col_stats["max"] = high if col_stats["max"] is None else max(col_stats["max"], high)
+
+    columns = []
+    for col, col_stats in stats.items():
+        dtype = meta["dtypes"][col] if meta is not None else str(col_stats["dtype"] or np.dtype(object))
+        columns.append({
+            "name": col,
+            "dtype": dtype,
+            "null_ratio": col_stats["nulls"] / rows if rows else 0.0,
+            "distinct_approx": col_stats["hll"].estimate(),
+            "min": _to_json_scalar(col_stats["min"]),
+            "max": _to_json_scalar(col_stats["max"]),
+            "sample_values": [_to_json_scalar(v) for v in col_stats["samples"]],
+        })
+
+    profile = {
+        "version": PROFILE_FORMAT_VERSION,
+        "source": source_stamp(csv_path),
+        "rows": rows,
+        "columns": columns,
+    }
+
+    path = profile_path(csv_path)
+    tmp = temp_path(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f)
+    os.replace(tmp, path)
+
+    return profile
+
+def load_column_profile(csv_path):
+    """Return the stored profile of a CSV, building it if missing or stale."""
+    try:
+        with open(profile_path(csv_path), "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        if profile.get("version") == PROFILE_FORMAT_VERSION and profile.get("source") == source_stamp(csv_path):
+            return profile
+    except (OSError, ValueError):
+        pass
+    return build_column_profile(csv_path)
@@ -5,6 +5,32 @@ import os
 # Default values for regressor
 DEFAULT_EPOCHS = 200
 DEFAULT_LR = 0.01
+DEFAULT_CHECKPOINT_EVERY = 0  # Epochs between training checkpoints, 0 (default) disables them
+CHECKPOINT_DIR = "checkpoints"  # Per-session folder of party checkpoints, removed once the session completes
+
+# Verbose joined-dataset preview
+DEFAULT_PREVIEW_HEAD_ROWS = 10
+DEFAULT_PREVIEW_TAIL_ROWS = 5
+
+# Bulk array transfers between parties
+TRANSFER_QUANTIZE = None  # None (lossless float64), "int32" or "int64" fixed-point
+TRANSFER_COMPRESSION = "zstd"  # None, "zstd" or "lz4"; skipped if the codec is not installed
+TRANSFER_COMPRESSION_MIN_BYTES = 1024 * 1024  # Smaller blocks are sent uncompressed
+
+# Streaming uploads
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # Bytes read from the request per step
+UPLOAD_MAX_HEADER_BYTES = 1024 * 1024  # Longest accepted CSV header line
+UPLOAD_DECOMPRESS_INPUT_BYTES = 64 * 1024  # Compressed bytes fed to the decompressor per step
+UPLOAD_MAX_FORM_FIELD_BYTES = 64 * 1024  # Text fields of a multipart upload, in total
+UPLOAD_MULTIPART_OVERHEAD_BYTES = 64 * 1024  # Allowed beyond the file size in a multipart Content-Length
+CHUNKED_UPLOAD_DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024  # Resumable upload chunk size
+CHUNKED_UPLOAD_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+CHUNKED_UPLOAD_DIR = ".chunks"  # Per-session folder holding chunks until finalize
+UPLOAD_OBJECT_DIR = ".objects"  # Content-addressed uploads shared by all sessions, inside UPLOAD_DIR
+
+# Streaming batch prediction
+PREDICT_STREAM_CHUNK_ROWS = 65536  # CSV rows parsed and scored per step
+PREDICT_STREAM_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}  # Output format -> media type
 
 # Constant for dirs
 LOG_DIR = "logs"
@@ -12,9 +38,14 @@ RESULT_DIR = "results"
 UPLOAD_DIR = "uploads"
 MODEL_DIR = "models"
 STATIC_DIR = "static"
+CACHE_DIR = "cache"
 
 # All directories that need to be created
-ALL_DIRS = [LOG_DIR, RESULT_DIR, UPLOAD_DIR, MODEL_DIR, STATIC_DIR]
+ALL_DIRS = [LOG_DIR, RESULT_DIR, UPLOAD_DIR, MODEL_DIR, STATIC_DIR, CACHE_DIR]
+
+# Preprocessed party data reused across runs, evicted least recently used first
+PREPROCESS_CACHE_DIR = os.path.join(CACHE_DIR, "preprocessed")
+PREPROCESS_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
 
 def ensure_all_directories_exist():
     """Ensure all required directories exist."""
@@ -0,0 +1,186 @@
+# utils/csv_cache.py
+
+import json
+import os
+import numpy as np
+import uuid
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar cache is optional, readers fall back to the CSV
+    pa = pq = None
+
+CACHE_FORMAT_VERSION = 2
+CSV_BATCH_ROWS = 65536
+
+def cache_paths(csv_path):
+    """Return the (columnar, metadata) sidecar paths stored next to a CSV file."""
+    base = os.path.splitext(csv_path)[0]
+    return f"{base}.parquet", f"{base}.meta.json"
+
+def source_stamp(csv_path):
+    """Size and mtime of a source file, used to detect stale sidecars."""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def temp_path(path):
+    """Unique sibling path for atomic writes, safe when builders run concurrently."""
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+def merge_dtype(current, new):
+    """Dtype of a column whose batches were parsed as current and new."""
+    if current is None or current == new:
+        return new
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new) \
+            and not pd.api.types.is_bool_dtype(current) and not pd.api.types.is_bool_dtype(new):
+        return np.result_type(current, new)
+    return np.dtype(object)
+
+def _arrow_type(dtype):
+    # Text (object) columns are stored as strings, missing values as nulls
+    return pa.string() if dtype == object else pa.from_numpy_dtype(dtype)
+
+def infer_csv_dtypes(csv_path, batch_rows=CSV_BATCH_ROWS):
+    """
+    Settle each column's dtype over all batches of a CSV, with the same pandas
+    inference as every other reader, in one pass of batch_rows rows at a time.
+
+    Returns:
+        ({column: dtype} in file order, row count)
+    """
+    dtypes = dict.fromkeys(read_csv_header(csv_path))
+    rows = 0
+    for batch in pd.read_csv(csv_path, chunksize=batch_rows):
+        rows += len(batch)
+        for col, dtype in batch.dtypes.items():
+            dtypes[col] = merge_dtype(dtypes[col], dtype)
+    # Header-only file: read_csv yields object columns
+    return {col: dtype if dtype is not None else np.dtype(object) for col, dtype in dtypes.items()}, rows
+
+def build_csv_cache(csv_path, sha256=None, batch_rows=CSV_BATCH_ROWS):
+    """
+    Parse an uploaded CSV and store it next to the source:
+    - {name}.parquet: typed columnar copy (only if pyarrow is installed)
+    - {name}.meta.json: header, dtypes, row count, source size/mtime and the
+      content hash when known
+
+    The CSV is read in batches of batch_rows rows, so memory use does not
+    grow with the file. A first pass settles each column's dtype over all
+    batches (with the same pandas inference as every other reader); the
+    second writes the Parquet file batch by batch with that fixed schema.
+    Columns that mix numbers and text are stored as text.
+
+    Returns:
+        The metadata dictionary.
+    """
+    parquet_path, meta_path = cache_paths(csv_path)
+    dtypes, rows = infer_csv_dtypes(csv_path, batch_rows)
+
+    columnar = None
+    if pq is not None:
+        parquet_tmp = temp_path(parquet_path)
+        try:
+            schema = pa.schema([(col, _arrow_type(dtype)) for col, dtype in dtypes.items()])
+            with pq.ParquetWriter(parquet_tmp, schema) as writer:
+                for batch in pd.read_csv(csv_path, dtype=dtypes, chunksize=batch_rows):
+                    writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+            os.replace(parquet_tmp, parquet_path)
+            columnar = "parquet"
+        except Exception as e:
+            # e.g. values that do not fit the settled dtype; keep serving from CSV
+            print(f"⚠️ Columnar cache skipped for {csv_path}: {e}")
+            if os.path.exists(parquet_tmp):
+                os.remove(parquet_tmp)
+
+    meta = {
+        "version": CACHE_FORMAT_VERSION,
+        "source": source_stamp(csv_path),
+        "columns": list(dtypes),
+        "dtypes": {col: str(dtype) for col, dtype in dtypes.items()},
+        "rows": rows,
+        "columnar": columnar,
+        "sha256": sha256,
+    }
+    meta_tmp = temp_path(meta_path)
+    with open(meta_tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, meta_path)
+
+    return meta
+
+def load_csv_meta(csv_path):
+    """Return the cache metadata of a CSV, or None if missing or stale."""
+    _, meta_path = cache_paths(csv_path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("source") != source_stamp(csv_path):
+        return None
+    return meta
+
+def read_csv_header(csv_path):
+    """Column names of a CSV, from the cached metadata when available."""
+    meta = load_csv_meta(csv_path)
+    if meta is not None:
+        return meta["columns"]
+    return pd.read_csv(csv_path, nrows=0).columns.tolist()
+
+def _project(csv_path, meta, columns):
+    # Requested columns in file order
+    if columns is None:
+        return None
+    header = meta["columns"] if meta is not None else read_csv_header(csv_path)
+    wanted = set(columns)
+    return [col for col in header if col in wanted]
+
+def _restore_missing_strings(df):
+    # Parquet stores missing strings as None, read_csv yields NaN
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+def read_csv_columns(csv_path, columns=None):
+    """
+    Read a CSV as a DataFrame, optionally projected to the given columns
+    (kept in file order). Uses the memory-mapped columnar cache when it is
+    present and fresh, otherwise parses the CSV.
+    """
+    meta = load_csv_meta(csv_path)
+    columns = _project(csv_path, meta, columns)
+
+    if meta is not None and meta.get("columnar") and pq is not None:
+        df = pd.read_parquet(cache_paths(csv_path)[0], columns=columns, memory_map=True)
+        return _restore_missing_strings(df)
+
+    return pd.read_csv(csv_path, usecols=columns)
+
+def iter_csv_batches(csv_path, columns=None, batch_rows=CSV_BATCH_ROWS, dtypes=None):
+    """
+    Yield a CSV as DataFrames of at most batch_rows rows, optionally projected
+    like read_csv_columns. The index runs on across batches, so concatenated
+    batches equal a full read. Batches are decoded from the columnar cache
+    (multithreaded) when it is fresh, otherwise the CSV is parsed in chunks,
+    with the given {column: dtype} (e.g. from infer_csv_dtypes) so that every
+    batch has the same schema.
+    """
+    meta = load_csv_meta(csv_path)
+    columns = _project(csv_path, meta, columns)
+
+    if meta is not None and meta.get("columnar") and pq is not None:
+        parquet_file = pq.ParquetFile(cache_paths(csv_path)[0], memory_map=True)
+        start = 0
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns, use_threads=True):
+            df = _restore_missing_strings(batch.to_pandas())
+            df.index = pd.RangeIndex(start, start + len(df))
+            start += len(df)
+            yield df
+    else:
+        if dtypes is not None and columns is not None:
+            dtypes = {col: dtype for col, dtype in dtypes.items() if col in columns}
+        yield from pd.read_csv(csv_path, usecols=columns, dtype=dtypes, chunksize=batch_rows)
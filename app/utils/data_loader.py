@@ -1,8 +1,12 @@
 # utils/data_loader.py
 
 import csv
+import sys
+import numpy as np
 import pandas as pd
 from utils.data_preprocessor import DataPreprocessor
+from utils.csv_cache import infer_csv_dtypes, iter_csv_batches, load_csv_meta, read_csv_columns, read_csv_header
+from utils.preprocess_cache import file_content_hash, preprocess_cache_key, load_preprocessed, store_preprocessed
 from interface.identifier_config import IdentifierConfig, IdentifierMode
 
 def load_party_data(filename):
@@ -17,14 +21,102 @@ def load_party_data(filename):
             y_local.append(label)
     return X_local, y_local
 
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+def _is_numeric_dtype(dtype):
+    # Same columns as select_dtypes(include=['number'])
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+def _row_dtype(dtypes):
+    """dtype of the rows of a frame with these column dtypes (see create_identifiers)"""
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes.items()}).to_numpy().dtype
+
+def _downcast(df):
+    """
+    Store integer columns in the smallest integer type holding their values,
+    and float64 columns as float32 when every value converts exactly
+    """
+    downcast = {
+        col: pd.to_numeric(df[col], downcast="integer").dtype
+        for col in df.select_dtypes(include=["integer"]).columns
+    }
+    for col in df.select_dtypes(include=["float64"]).columns:
+        values = df[col].to_numpy()
+        if np.array_equal(values.astype(np.float32), values, equal_nan=True):
+            downcast[col] = np.float32
+    return df.astype(downcast) if downcast else df
+
+def _read_projected(filename, identifier_config, label_name):
+    """
+    Read identifiers and the numeric (plus label) columns batch by batch.
+
+    Only identifier, label and numeric columns are decoded, from the columnar
+    cache or, without one, from the CSV after a first pass that settles the
+    column dtypes. Each batch is reduced to its identifiers and downcast
+    numeric columns before the next is read, so peak memory is about twice
+    the downcast projected columns (the kept batches and their concatenation)
+    plus one decoded batch; other columns are never held for the whole file.
+
+    Returns:
+        (identifiers Series, preprocessing input DataFrame, dropped column names)
+    """
+    meta = load_csv_meta(filename)
+    if meta is not None:
+        dtypes = meta["dtypes"]
+    else:
+        dtypes, _ = infer_csv_dtypes(filename)
+
+    id_columns = identifier_config.columns
+    candidates = [col for col in dtypes if col not in id_columns]
+    numeric_columns = [col for col in candidates if _is_numeric_dtype(dtypes[col])]
+    if label_name and label_name not in numeric_columns:
+        # Keep label column even if it's not numeric (for binary classification)
+        numeric_columns.append(label_name)
+    dropped_columns = [col for col in candidates if col not in numeric_columns]
+
+    # Identifiers must stringify as in the full frame, whose rows share one dtype
+    row_dtype = _row_dtype(dtypes)
+    identifier_parts, frames = [], []
+    batches = iter_csv_batches(
+        filename, columns=list(id_columns) + numeric_columns, dtypes=None if meta is not None else dtypes
+    )
+    for batch in batches:
+        identifier_parts.append(identifier_config.create_identifiers(batch, row_dtype=row_dtype))
+        frames.append(_downcast(batch[numeric_columns]))
+        del batch
+
+    if not frames:
+        # No data rows: keep the columns of a full read
+        empty = read_csv_columns(filename, columns=list(id_columns) + numeric_columns)
+        identifier_parts.append(identifier_config.create_identifiers(empty, row_dtype=row_dtype))
+        frames.append(empty[numeric_columns])
+
+    identifiers_series = pd.concat(identifier_parts) if len(identifier_parts) > 1 else identifier_parts[0]
+    df = pd.concat(frames) if len(frames) > 1 else frames[0]
+    return identifiers_series, df, dropped_columns
+
 def load_party_data_adapted(filename, preferred_label=None,
                            identifier_config=None,
                            verbose=False):
     """
     Dynamically loads CSV data for a party and returns:
     - identifiers: list of identifier values (based on identifier_config)
-    - X_local: list of feature vectors
-    - y_local: list of labels (if available, else None)
+    - X_local: C-contiguous float64 matrix of shape (n_samples, n_features)
+    - y_local: float64 label vector (if available, else None)
     - feature_names: names of features (excluding identifier columns and label)
     - label_name: the name of the label column (if available, else None)
     
@@ -34,8 +126,7 @@ def load_party_data_adapted(filename, preferred_label=None,
         identifier_config: IdentifierConfig object specifying how to create identifiers
         verbose: Whether to print preprocessing details
     """
-    # Load data into pandas DataFrame for preprocessing
-    df = pd.read_csv(filename)
+    header = read_csv_header(filename)
     
     # Default to user_id if no config provided
     if identifier_config is None:
@@ -45,33 +136,22 @@ def load_party_data_adapted(filename, preferred_label=None,
         )
     
     # Validate identifier columns exist
-    missing_cols = [col for col in identifier_config.columns if col not in df.columns]
+    missing_cols = [col for col in identifier_config.columns if col not in header]
     if missing_cols:
         raise ValueError(f"CSV file must contain identifier columns: {missing_cols}")
     
     # Identify label column
     label_name = None
-    if preferred_label and preferred_label in df.columns:
+    if preferred_label and preferred_label in header:
         label_name = preferred_label
     else:
         # Fallback to default candidates
         label_col_candidates = ["will_purchase", "purchase_amount"]
         for col in label_col_candidates:
-            if col in df.columns:
+            if col in header:
                 label_name = col
                 break
     
-    # Apply preprocessing if requested
-    preprocessing_report = None
-    
-    # Data pre-processing
-    # Create identifiers before preprocessing
-    identifiers_list = []
-    for _, row in df.iterrows():
-        identifier = identifier_config.create_identifier(row.to_dict())
-        identifiers_list.append(identifier)
-    identifiers_series = pd.Series(identifiers_list, index=df.index)
-    
     # Default preprocessing configuration
     default_config = {
         "remove_duplicates": False,
@@ -86,26 +166,31 @@ def load_party_data_adapted(filename, preferred_label=None,
         "correlation_threshold": 0.95
     }
     
-    # Create preprocessor
-    preprocessor = DataPreprocessor(verbose=verbose)
+    # Reuse the result of an earlier run on the same file content and settings
+    cache_key = preprocess_cache_key(file_content_hash(filename), default_config, identifier_config, label_name)
+    cached = load_preprocessed(cache_key)
+    if cached is not None:
+        identifiers, X_local, y_local, feature_names, label_name, preprocessing_report = cached
+        if verbose:
+            print(f"♻️ Reusing cached preprocessing result for {filename}", flush=True)
+            preprocessor = DataPreprocessor(verbose=verbose)
+            preprocessor.preprocessing_report = preprocessing_report
+            preprocessor.print_report()
+            print_preprocessing_summary(filename, preprocessing_report)
+        return identifiers, X_local, y_local, feature_names, label_name
     
-    # Temporarily remove identifier columns for preprocessing
-    df_without_identifiers = df.drop(columns=identifier_config.columns)
-    
-    # Filter out non-numeric columns (except label column)
-    numeric_columns = df_without_identifiers.select_dtypes(include=['number']).columns.tolist()
-    if label_name and label_name not in numeric_columns:
-        # Keep label column even if it's not numeric (for binary classification)
-        numeric_columns.append(label_name)
+    # Data pre-processing
+    # Identifiers (created before preprocessing) and only the numeric and label
+    # columns, read in batches from the columnar cache if built at upload
+    identifiers_series, df_numeric_only, non_numeric_cols = _read_projected(
+        filename, identifier_config, label_name
+    )
     
-    # Keep only numeric columns and label for preprocessing
-    if verbose:
-        all_columns = df_without_identifiers.columns.tolist()
-        non_numeric_cols = [col for col in all_columns if col not in numeric_columns]
-        if non_numeric_cols:
-            print(f"🗑️ Dropping non-numeric columns: {non_numeric_cols}", flush=True)
+    if verbose and non_numeric_cols:
+        print(f"🗑️ Dropping non-numeric columns: {non_numeric_cols}", flush=True)
     
-    df_numeric_only = df_without_identifiers[numeric_columns]
+    # Create preprocessor
+    preprocessor = DataPreprocessor(verbose=verbose)
     
     # Apply preprocessing
     df_preprocessed = preprocessor.preprocess(
@@ -113,6 +198,7 @@ def load_party_data_adapted(filename, preferred_label=None,
         label_column=label_name,
         **default_config
     )
+    del df_numeric_only
     
     # Get preprocessing report
     preprocessing_report = preprocessor.get_preprocessing_report()
@@ -134,19 +220,27 @@ def load_party_data_adapted(filename, preferred_label=None,
     excluded_cols = set(identifier_config.columns) | {label_name} if label_name else set(identifier_config.columns)
     feature_cols = [col for col in df.columns if col not in excluded_cols]
     
-    # Extract features and labels
-    X_local = df[feature_cols].values.tolist()
-    y_local = df[label_name].values.tolist() if label_name else None
+    # Extract features and labels as contiguous float64 arrays
+    X_local = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float64))
+    y_local = df[label_name].to_numpy(dtype=np.float64) if label_name else None
     
     # Get feature names
     feature_names = feature_cols
     
     # Store preprocessing report if we want to access it later
     if preprocessing_report and verbose:
-        print(f"\n📋 Preprocessing summary for {filename}:", flush=True)
-        print(f"  📏 Original samples: {preprocessing_report['original_shape'][0]}", flush=True)
-        print(f"  ✅ Final samples: {preprocessing_report['final_shape'][0]}", flush=True)
-        print(f"  🗑️  Samples removed: {preprocessing_report['rows_removed']}", flush=True)
+        print_preprocessing_summary(filename, preprocessing_report)
+    
+    try:
+        store_preprocessed(cache_key, identifiers, X_local, y_local, feature_names, label_name, preprocessing_report)
+    except OSError as e:
+        print(f"⚠️ Could not cache preprocessing result: {e}", flush=True)
     
     return identifiers, X_local, y_local, feature_names, label_name
 
+def print_preprocessing_summary(filename, preprocessing_report):
+    print(f"\n📋 Preprocessing summary for {filename}:", flush=True)
+    print(f"  📏 Original samples: {preprocessing_report['original_shape'][0]}", flush=True)
+    print(f"  ✅ Final samples: {preprocessing_report['final_shape'][0]}", flush=True)
+    print(f"  🗑️  Samples removed: {preprocessing_report['rows_removed']}", flush=True)
+
@@ -1,50 +1,93 @@
 # utils/data_normalizer.py
 
 import sys
+import numpy as np
 
-def minmax_normalize(X):
-    if not X:
-        return X
+NORMALIZER_METHODS = ('minmax', 'zscore', 'robust')
+
+def fit_normalizer(X, method='zscore'):
+    """
+    Compute per-feature scaling statistics in one vectorized pass.
+
+    Returns a JSON-serializable state so the same scaling can be re-applied
+    at inference time: {"method": ..., "center": [...], "scale": [...]}
+    where normalized = (x - center) / scale.
+    """
+    if method not in NORMALIZER_METHODS:
+        raise ValueError(f"Unsupported normalization method: {method}")
+
+    X = np.asarray(X, dtype=np.float64)
+    n_features = X.shape[1] if X.ndim == 2 else 0
+
+    if X.ndim != 2 or X.shape[0] == 0:
+        center = np.zeros(n_features)
+        scale = np.ones(n_features)
+    elif method == 'minmax':
+        center = X.min(axis=0)
+        scale = X.max(axis=0) - center
+    elif method == 'zscore':
+        center = X.mean(axis=0)
+        scale = X.std(axis=0)
+    else:  # robust
+        q25, center, q75 = np.percentile(X, [25, 50, 75], axis=0)
+        scale = q75 - q25
 
-    num_features = len(X[0])
-    for j in range(num_features):
-        feature_column = [row[j] for row in X]
-        min_val = min(feature_column)
-        max_val = max(feature_column)
-        range_val = max_val - min_val if max_val != min_val else 1.0
+    # Constant features are only centered
+    scale = np.where(scale != 0, scale, 1.0)
 
-        for i in range(len(X)):
-            X[i][j] = (X[i][j] - min_val) / range_val
-    
+    return {"method": method, "center": center.tolist(), "scale": scale.tolist()}
+
+def apply_normalizer(X, state):
+    """
+    Scale X with a fitted state. A float64 ndarray is updated in place;
+    other inputs are converted to a new float64 array.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.size == 0:
+        return X
+
+    X -= np.asarray(state["center"], dtype=np.float64)
+    X /= np.asarray(state["scale"], dtype=np.float64)
     return X
 
+def minmax_normalize(X):
+    return apply_normalizer(X, fit_normalizer(X, 'minmax'))
+
 def zscore_normalize(X):
-    if not X:
-        return X
+    return apply_normalizer(X, fit_normalizer(X, 'zscore'))
 
-    num_features = len(X[0])
-    for j in range(num_features):
-        feature_column = [row[j] for row in X]
-        mean_val = sum(feature_column) / len(feature_column)
-        std_val = (sum((x - mean_val) ** 2 for x in feature_column) / len(feature_column)) ** 0.5
-        std_val = std_val if std_val != 0 else 1.0
+def robust_normalize(X):
+    return apply_normalizer(X, fit_normalizer(X, 'robust'))
 
-        for i in range(len(X)):
-            X[i][j] = (X[i][j] - mean_val) / std_val
-    
-    return X
+def merge_normalizer_states(states, feature_counts, method):
+    """
+    Concatenate per-party states in party order into the state of the joined
+    feature matrix. Parties without a state contribute identity scaling.
+    """
+    center, scale = [], []
+    for state, count in zip(states, feature_counts):
+        if state is None:
+            center.extend([0.0] * count)
+            scale.extend([1.0] * count)
+        else:
+            center.extend(state["center"])
+            scale.extend(state["scale"])
+    return {"method": method, "center": center, "scale": scale}
 
 def normalize_features(data, method='zscore'):
-    normalizers = {
-        'minmax': minmax_normalize,
-        'zscore': zscore_normalize
-    }
+    """
+    Normalize a feature matrix column-wise.
 
-    if method not in normalizers:
+    Returns:
+        (X_normalized, state): the normalized float64 array (data itself when it
+        already is a float64 ndarray) and the serializable fit state.
+    """
+    if method not in NORMALIZER_METHODS:
         raise ValueError(f"Unsupported normalization method: {method}")
 
     try:
-        return normalizers[method](data)
+        state = fit_normalizer(data, method)
+        return apply_normalizer(data, state), state
     except ValueError as e:
         print(f"[Normalizer] ❌ Normalization error: {e}")
         sys.exit(1)
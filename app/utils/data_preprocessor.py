@@ -1,5 +1,6 @@
 # utils/data_preprocessor.py
 
+import warnings
 import pandas as pd
 import numpy as np
 from mpyc.runtime import mpc
@@ -7,8 +8,67 @@ from typing import Optional, Dict, Any
 
 from utils.cli_parser import print_log
 
+# Columns per block when scanning correlations, bounds the block to block x d values
+CORRELATION_BLOCK_COLUMNS = 256
+# Float32 correlations this close to the threshold are recomputed in float64
+CORRELATION_RECHECK_TOLERANCE = 1e-4
+
 def log(msg):
     print_log(mpc.pid, msg)
+
+def find_correlated_columns(values: np.ndarray, threshold: float,
+                            block_columns: int = CORRELATION_BLOCK_COLUMNS):
+    """
+    Return {i: (j, corr)} for every column i that has a later column j with
+    |corr(i, j)| > threshold, where j is the most correlated later column.
+
+    Correlations are computed blockwise on standardized float32 data, so only
+    a block_columns x d slice of the correlation matrix exists at any time.
+    Constant columns have no defined correlation and are never matched.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_rows, n_cols = values.shape
+    centered = values - values.mean(axis=0)
+    norms = np.sqrt(np.einsum("ij,ij->j", centered, centered))
+    norms[norms == 0] = np.inf  # Constant columns standardize to zeros
+    standardized = centered / norms
+    z = standardized.astype(np.float32)
+
+    matches = {}
+    for start in range(0, n_cols, block_columns):
+        stop = min(start + block_columns, n_cols)
+        # corr of block columns against themselves and every later column
+        corr = np.abs(z[:, start:stop].T @ z[:, start:])
+        # Keep only pairs with j > i
+        corr[np.tril_indices(stop - start, m=n_cols - start)] = 0
+
+        # Settle borderline float32 values with exact float64 products
+        borderline = np.nonzero(np.abs(corr - threshold) < CORRELATION_RECHECK_TOLERANCE)
+        for bi, bj in zip(*borderline):
+            corr[bi, bj] = abs(standardized[:, start + bi] @ standardized[:, start + bj])
+
+        for bi in np.nonzero((corr > threshold).any(axis=1))[0]:
+            bj = int(np.argmax(corr[bi]))
+            matches[start + int(bi)] = (start + bj, float(corr[bi, bj]))
+
+    return matches
+
+def iqr_inlier_mask(df: pd.DataFrame, columns, threshold: float) -> np.ndarray:
+    """
+    Row mask of values within [Q1 - threshold * IQR, Q3 + threshold * IQR] in
+    every column (NaN fails). Quantiles are exact and skip NaN like pandas;
+    only one float64 column copy exists at a time.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col in columns:
+        values = df[col].to_numpy(dtype=np.float64)
+        with warnings.catch_warnings():
+            # An all-NaN column has NaN bounds and removes every row, as with pandas
+            warnings.simplefilter("ignore", RuntimeWarning)
+            q1, q3 = np.nanquantile(values, [0.25, 0.75])
+        iqr = q3 - q1
+        mask &= (values >= q1 - threshold * iqr) & (values <= q3 + threshold * iqr)
+    return mask
     
 class DataPreprocessor:
     """Comprehensive data preprocessing for ML pipelines"""
@@ -24,7 +84,8 @@ class DataPreprocessor:
             "columns_removed": 0,
             "null_values_handled": 0,
             "duplicates_removed": 0,
-            "outliers_removed": 0
+            "outliers_removed": 0,
+            "correlated_columns_dropped": []  # [{"column", "correlated_with", "correlation"}]
         }
     
     def preprocess(self, 
@@ -39,7 +100,8 @@ class DataPreprocessor:
                    missing_threshold: float = 0.5,  # Drop columns with >50% missing
                    drop_constant_cols: bool = True,
                    drop_high_correlation: bool = True,
-                   correlation_threshold: float = 0.95) -> pd.DataFrame:
+                   correlation_threshold: float = 0.95,
+                   correlation_sample_rows: Optional[int] = None) -> pd.DataFrame:
         """
         Apply comprehensive preprocessing steps to the dataframe.
         
@@ -56,6 +118,7 @@ class DataPreprocessor:
             drop_constant_cols: Whether to drop constant columns
             drop_high_correlation: Whether to drop highly correlated features
             correlation_threshold: Threshold for correlation
+            correlation_sample_rows: Estimate correlations on a random sample of this many rows
             
         Returns:
             Preprocessed dataframe
@@ -107,7 +170,8 @@ class DataPreprocessor:
         # Step 5: Remove highly correlated features
         if drop_high_correlation and len(df.columns) > 2:  # Need at least 3 columns
             cols_before = len(df.columns)
-            df = self._remove_highly_correlated(df, correlation_threshold, label_column)
+            df = self._remove_highly_correlated(df, correlation_threshold, label_column,
+                                                correlation_sample_rows)
             cols_removed = cols_before - len(df.columns)
             if cols_removed > 0:
                 self.preprocessing_report["columns_removed"] += cols_removed
@@ -163,7 +227,7 @@ class DataPreprocessor:
             
             for col in df.columns:
                 if df[col].isnull().any():
-                    if df[col].dtype in ['float64', 'int64']:
+                    if df[col].dtype.kind in 'iuf':  # loaded columns may be downcast
                         if method == "mean":
                             df_filled[col].fillna(df[col].mean(), inplace=True)
                         elif method == "median":
@@ -201,8 +265,12 @@ class DataPreprocessor:
         return df.drop(columns=constant_cols)
     
     def _remove_highly_correlated(self, df: pd.DataFrame, threshold: float,
-                                  label_column: Optional[str]) -> pd.DataFrame:
-        """Remove highly correlated features"""
+                                  label_column: Optional[str],
+                                  sample_rows: Optional[int] = None) -> pd.DataFrame:
+        """
+        Remove highly correlated features: a column is dropped when any later
+        numeric column correlates with it above the threshold.
+        """
         # Get numeric columns only
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
         
@@ -213,24 +281,28 @@ class DataPreprocessor:
         if len(numeric_cols) < 2:
             return df
         
-        # Calculate correlation matrix
-        corr_matrix = df[numeric_cols].corr().abs()
+        numeric = df[numeric_cols]
+        if numeric.isnull().values.any():
+            # Pairwise-complete correlations need the dense pandas path
+            upper_tri = np.triu(numeric.corr().abs().to_numpy(), k=1)
+            upper_tri = np.where(np.isnan(upper_tri), 0.0, upper_tri)
+            matches = {
+                int(i): (int(np.argmax(upper_tri[i])), float(upper_tri[i].max()))
+                for i in np.nonzero((upper_tri > threshold).any(axis=1))[0]
+            }
+        else:
+            values = numeric.to_numpy(dtype=np.float64)
+            if sample_rows and len(values) > sample_rows:
+                rows = np.sort(np.random.default_rng(0).choice(len(values), sample_rows, replace=False))
+                values = values[rows]
+            matches = find_correlated_columns(values, threshold)
         
-        # Find highly correlated pairs
-        upper_tri = corr_matrix.where(
-            np.triu(np.ones(corr_matrix.shape), k=1).astype(bool)
+        to_drop = [numeric_cols[i] for i in sorted(matches)]
+        self.preprocessing_report["correlated_columns_dropped"].extend(
+            {"column": numeric_cols[i], "correlated_with": numeric_cols[j], "correlation": round(corr, 6)}
+            for i, (j, corr) in sorted(matches.items())
         )
         
-        # Find features to drop
-        to_drop = []
-        for column in upper_tri.columns:
-            if column in to_drop:
-                continue
-            correlated_features = list(upper_tri.index[upper_tri[column] > threshold])
-            to_drop.extend(correlated_features)
-        
-        to_drop = list(set(to_drop))
-        
         if to_drop:
             log(f"🔗 Removing highly correlated features: {to_drop}")
         
@@ -245,24 +317,12 @@ class DataPreprocessor:
         if label_column and label_column in numeric_cols:
             numeric_cols.remove(label_column)
         
-        if not numeric_cols:
+        if not numeric_cols or df.empty:
             return df
         
         if method == "iqr":
-            # IQR method
-            Q1 = df[numeric_cols].quantile(0.25)
-            Q3 = df[numeric_cols].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            lower_bound = Q1 - threshold * IQR
-            upper_bound = Q3 + threshold * IQR
-            
-            # Create mask for outliers
-            mask = True
-            for col in numeric_cols:
-                mask = mask & (df[col] >= lower_bound[col]) & (df[col] <= upper_bound[col])
-            
-            return df[mask]
+            # IQR method, column by column over the frame already in memory
+            return df[iqr_inlier_mask(df, numeric_cols, threshold)]
         
         elif method == "zscore":
             # Z-score method
@@ -289,4 +349,6 @@ class DataPreprocessor:
         log("\n📋 Steps applied:")
         for step in report['steps_applied']:
             log(f"  ✔️  {step}")
+        for decision in report.get('correlated_columns_dropped', []):
+            log(f"  🔗 {decision['column']} ~ {decision['correlated_with']} (|r| = {decision['correlation']:.4f})")
         log("="*50 + "\n")
\ No newline at end of file
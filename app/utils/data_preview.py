@@ -0,0 +1,68 @@
+# utils/data_preview.py
+
+import os
+import numpy as np
+
+def _format_row(features, label):
+    return list(map(str, features)) + [str(round(label, 2))]
+
+def print_dataset_preview(headers, X, y, head_rows, tail_rows):
+    """
+    Print a bounded head/tail sample of the joined dataset as a table.
+
+    Column widths are computed from the sampled rows only, so the cost does not
+    depend on the number of records.
+
+    Args:
+        headers: Column names (features + label)
+        X: Feature matrix without the bias column
+        y: Label vector
+        head_rows: Number of leading rows to print
+        tail_rows: Number of trailing rows to print
+    """
+    n_rows = len(y)
+    head_rows = max(head_rows, 0)
+    tail_rows = max(tail_rows, 0)
+
+    if n_rows <= head_rows + tail_rows:
+        head_indices, tail_indices = range(n_rows), range(0)
+    else:
+        head_indices, tail_indices = range(head_rows), range(n_rows - tail_rows, n_rows)
+
+    sample = [(idx, _format_row(X[idx], y[idx])) for idx in list(head_indices) + list(tail_indices)]
+
+    # Calculate max width for each column over the sample
+    col_widths = []
+    for col_idx in range(len(headers)):
+        max_data_len = max((len(row[col_idx]) for _, row in sample), default=0)
+        col_widths.append(max(max_data_len, len(headers[col_idx])) + 2)
+
+    idx_width = max(len(str(n_rows - 1)), 3) + 2
+    header = "idx".ljust(idx_width) + "| " + " | ".join(
+        [headers[i].ljust(col_widths[i]) for i in range(len(headers))]
+    )
+    separator = "-" * len(header)
+
+    print(header)
+    print(separator)
+
+    for position, (idx, row) in enumerate(sample):
+        if position == len(head_indices) and len(tail_indices) > 0:
+            omitted = n_rows - len(head_indices) - len(tail_indices)
+            print(f"... {omitted} rows omitted ...")
+        row_str = " | ".join([row[i].ljust(col_widths[i]) for i in range(len(row))])
+        print(str(idx).ljust(idx_width) + "| " + row_str)
+
+    print(f"[{n_rows} rows x {len(headers)} columns]", flush=True)
+
+def dump_dataset(path, headers, X, y):
+    """
+    Write the full joined dataset once as a gzip-compressed CSV artifact.
+
+    Returns:
+        The path of the written file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = np.column_stack([X, y])
+    np.savetxt(path, table, delimiter=",", fmt="%.17g", header=",".join(headers), comments="")
+    return path
@@ -0,0 +1,103 @@
+# utils/model_format.py
+
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from utils.constant import MODEL_DIR
+from utils.csv_cache import temp_path
+
+# Layout: magic | uint32 LE header length | JSON header (space padded) | float64 LE arrays
+MODEL_MAGIC = b"MPCMODEL"
+MODEL_FORMAT_VERSION = 1
+MODEL_SUFFIX = ".model"
+LEGACY_MODEL_SUFFIX = ".pkl"
+# Arrays start on 8-byte boundaries so they can be mapped as float64 in place
+ARRAY_ALIGNMENT = 8
+# Numeric vectors stored as raw float64 instead of JSON, by key path in the model data
+ARRAY_FIELDS = (("theta",), ("normalizer_state", "center"), ("normalizer_state", "scale"))
+
+def session_model_path(session_id):
+    """Saved model of a session: the compact artifact, or a legacy pickle if only that exists."""
+    path = os.path.join(MODEL_DIR, f"{session_id}_model{MODEL_SUFFIX}")
+    legacy_path = os.path.join(MODEL_DIR, f"{session_id}_model{LEGACY_MODEL_SUFFIX}")
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
+
+def write_model(path, model_data):
+    """
+    Write model data as a compact artifact: theta and the normalizer vectors
+    as raw little-endian float64, every other field in the JSON header.
+    """
+    fields = dict(model_data)
+    if isinstance(fields.get("normalizer_state"), dict):
+        # Copied, its vectors are moved out below
+        fields["normalizer_state"] = dict(fields["normalizer_state"])
+
+    arrays, layout, offset = [], [], 0
+    for key_path in ARRAY_FIELDS:
+        parent = fields
+        for key in key_path[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+        if not isinstance(parent, dict) or parent.get(key_path[-1]) is None:
+            continue
+        values = np.asarray(parent.pop(key_path[-1]), dtype="<f8").ravel()
+        arrays.append(values)
+        layout.append({"path": list(key_path), "offset": offset, "length": len(values)})
+        offset += values.nbytes
+
+    fields = json.loads(json.dumps(fields, default=_to_json))
+    header = {"version": MODEL_FORMAT_VERSION, "arrays": layout, "fields": fields}
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    prefix_length = len(MODEL_MAGIC) + 4
+    header_bytes += b" " * (-(prefix_length + len(header_bytes)) % ARRAY_ALIGNMENT)
+
+    tmp = temp_path(path)
+    with open(tmp, "wb") as f:
+        f.write(MODEL_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for values in arrays:
+            f.write(values.tobytes())
+    os.replace(tmp, path)
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+def read_model(path):
+    """
+    Read a compact artifact into model data, or return None if the file is
+    not one (e.g. a legacy pickle). The stored vectors are read-only float64
+    arrays over a memory map of the file, not copies.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+            return None
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length))
+        if header.get("version") != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format version: {header.get('version')}")
+
+        data_offset = len(MODEL_MAGIC) + 4 + header_length
+        buffer = None
+        if os.fstat(f.fileno()).st_size > data_offset:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    model_data = header["fields"]
+    for array in header["arrays"]:
+        if array["length"]:
+            values = np.frombuffer(buffer, dtype="<f8", count=array["length"],
+                                   offset=data_offset + array["offset"])
+        else:
+            values = np.empty(0)
+        parent = model_data
+        for key in array["path"][:-1]:
+            parent = parent[key]
+        parent[array["path"][-1]] = values
+    return model_data
@@ -0,0 +1,59 @@
+# utils/object_store.py
+
+import os
+import shutil
+from utils.constant import UPLOAD_DIR, UPLOAD_OBJECT_DIR
+from utils.csv_cache import build_csv_cache, cache_paths, load_csv_meta, temp_path
+from utils.column_profile import load_column_profile, profile_path
+
+OBJECT_DIR = os.path.join(UPLOAD_DIR, UPLOAD_OBJECT_DIR)
+
+def object_path(sha256, suffix=".csv"):
+    """Path of a stored upload (or one of its derived artifacts) by content hash."""
+    return os.path.join(OBJECT_DIR, f"{sha256}{suffix}")
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst, falling back to a copy (e.g. across filesystems)."""
+    tmp = temp_path(dst)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+def store_object(part_path, sha256, dest_path):
+    """
+    Move a finished upload into the object store, dropping it if the same
+    content is already stored, and link the stored object to dest_path.
+
+    Returns:
+        The object path.
+    """
+    os.makedirs(OBJECT_DIR, exist_ok=True)
+    obj_path = object_path(sha256)
+
+    if os.path.exists(obj_path):
+        os.remove(part_path)
+    else:
+        os.replace(part_path, obj_path)
+
+    link_or_copy(obj_path, dest_path)
+    return obj_path
+
+def link_derived_artifacts(sha256, csv_path):
+    """
+    Build the columnar cache and column profile of a stored object unless a
+    fresh copy exists already (e.g. from another session), then link them
+    next to csv_path.
+    """
+    obj_path = object_path(sha256)
+    if load_csv_meta(obj_path) is None:
+        build_csv_cache(obj_path, sha256=sha256)
+    load_column_profile(obj_path)
+
+    obj_parquet, obj_meta = cache_paths(obj_path)
+    parquet_path, meta_path = cache_paths(csv_path)
+    for src, dst in [(obj_parquet, parquet_path), (profile_path(obj_path), profile_path(csv_path)),
+                     (obj_meta, meta_path)]:
+        if os.path.exists(src):
+            link_or_copy(src, dst)
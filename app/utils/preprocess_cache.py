@@ -0,0 +1,136 @@
+# utils/preprocess_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+from utils.constant import PREPROCESS_CACHE_DIR, PREPROCESS_CACHE_MAX_BYTES, UPLOAD_CHUNK_BYTES
+from utils.csv_cache import load_csv_meta
+
+# Bump whenever the loader or preprocessor output changes for the same input
+PREPROCESS_CACHE_VERSION = 5
+
+META_FILE = "meta.json"
+
+def file_content_hash(csv_path):
+    """SHA-256 of a CSV, from the upload metadata when known, otherwise computed."""
+    meta = load_csv_meta(csv_path)
+    if meta is not None and meta.get("sha256"):
+        return meta["sha256"]
+
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _normalize(value):
+    # Treat 1 and 1.0 (or 0.5 and 0.50) as the same setting
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def preprocess_cache_key(content_hash, preprocessing_config, identifier_config, label_name):
+    """Cache key of a loader result: file content plus everything that shapes the output."""
+    payload = {
+        "version": PREPROCESS_CACHE_VERSION,
+        "file": content_hash,
+        "preprocessing": _normalize(preprocessing_config),
+        "identifier": identifier_config.model_dump(mode="json"),
+        "label": label_name,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+def load_preprocessed(key, cache_dir=PREPROCESS_CACHE_DIR):
+    """
+    Return a cached loader result as
+    (identifiers, X_local, y_local, feature_names, label_name, report), or None.
+
+    Arrays are memory-mapped copy-on-write, so in-place normalization does
+    not touch the cache files.
+    """
+    entry = os.path.join(cache_dir, key)
+    try:
+        with open(os.path.join(entry, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        identifiers = np.load(os.path.join(entry, "identifiers.npy")).tolist()
+        X_local = np.load(os.path.join(entry, "X.npy"), mmap_mode="c")
+        y_local = np.load(os.path.join(entry, "y.npy"), mmap_mode="c") if meta["has_label"] else None
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # Mark as recently used for LRU eviction
+    os.utime(os.path.join(entry, META_FILE))
+
+    report = meta["report"]
+    for key_name in ("original_shape", "final_shape"):
+        if report.get(key_name) is not None:
+            report[key_name] = tuple(report[key_name])
+
+    return identifiers, X_local, y_local, meta["feature_names"], meta["label_name"], report
+
+def store_preprocessed(key, identifiers, X_local, y_local, feature_names, label_name, report,
+                       cache_dir=PREPROCESS_CACHE_DIR, max_bytes=PREPROCESS_CACHE_MAX_BYTES):
+    """Write a loader result as .npy files plus metadata, then evict old entries."""
+    entry = os.path.join(cache_dir, key)
+    if os.path.isdir(entry):
+        return
+
+    # Build in a private directory and publish it with a single rename
+    tmp_entry = os.path.join(cache_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+    os.makedirs(tmp_entry)
+    try:
+        np.save(os.path.join(tmp_entry, "identifiers.npy"), np.array(identifiers, dtype=str))
+        np.save(os.path.join(tmp_entry, "X.npy"), np.ascontiguousarray(X_local, dtype=np.float64))
+        if y_local is not None:
+            np.save(os.path.join(tmp_entry, "y.npy"), np.asarray(y_local, dtype=np.float64))
+        with open(os.path.join(tmp_entry, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": PREPROCESS_CACHE_VERSION,
+                "feature_names": list(feature_names),
+                "label_name": label_name,
+                "has_label": y_local is not None,
+                "report": report,
+            }, f, default=_json_default)
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Another process published the same entry first
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        return
+
+    evict_preprocessed(cache_dir, max_bytes, keep=key)
+
+def evict_preprocessed(cache_dir=PREPROCESS_CACHE_DIR, max_bytes=PREPROCESS_CACHE_MAX_BYTES, keep=None):
+    """Remove least recently used entries until the cache fits in max_bytes."""
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        if name.startswith(".") or not os.path.isdir(entry):
+            continue
+        try:
+            size = sum(f.stat().st_size for f in os.scandir(entry))
+            last_used = os.stat(os.path.join(entry, META_FILE)).st_mtime
+        except OSError:
+            continue
+        entries.append((last_used, name, size))
+        total += size
+
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
@@ -1,9 +1,10 @@
 # utils/visualization.py
 
-import matplotlib.pyplot as plt
-from sklearn.metrics import mean_squared_error, r2_score, classification_report, roc_curve, roc_auc_score
 import math
 import os
+
+# matplotlib and scikit-learn are imported inside the Party 0 branches below:
+# the other parties call these helpers too but never plot or score.
     
 def plot_actual_vs_predicted(y_true, y_pred, mpc, save_path="linear_regression_plot.png"):
     """
@@ -19,6 +20,9 @@ def plot_actual_vs_predicted(y_true, y_pred, mpc, save_path="linear_regression_p
         # ROC-AUC Curve (only on Party 0)
         print(f"[Party {mpc.pid}] 📊 Saving the evaluation report...", flush=True)
         if mpc.pid == 0:
+            import matplotlib.pyplot as plt
+            from sklearn.metrics import mean_squared_error, r2_score
+
             # Calculate metrics
             mse = mean_squared_error(y_true, y_pred)
             rmse = math.sqrt(mse)
@@ -65,14 +69,17 @@ def plot_logistic_evaluation_report(y_true, y_pred, mpc, is_logging, save_path="
     """
     async def evaluate():
         # Classification report
-        report = classification_report(y_true, y_pred, zero_division=0)
         print(f"[Party {mpc.pid}] 📊 Saving the evaluation report...", flush=True)
         if is_logging:
-            print(report)
+            from sklearn.metrics import classification_report
+            print(classification_report(y_true, y_pred, zero_division=0))
 
         auc_roc_data = None
         # ROC-AUC Curve (only on Party 0)
         if mpc.pid == 0:
+            import matplotlib.pyplot as plt
+            from sklearn.metrics import roc_curve, roc_auc_score
+
             fpr, tpr, _ = roc_curve(y_true, y_pred)
             roc_auc = roc_auc_score(y_true, y_pred)
 
@@ -0,0 +1,103 @@
+# scripts/check_import_time.py
+
+"""
+Import-time budget check for the MPC party process.
+
+Runs `python -X importtime -c "import mpyc_task"` from the app directory, the
+same way every party process starts, and fails if:
+- the cumulative import time exceeds the budget, or
+- a module that must stay lazy (plotting, sklearn) is imported at startup.
+
+Usage:
+    python scripts/check_import_time.py [--budget-ms 1500] [--top 15] [--runs 3]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+# Only Party 0 plots and computes sklearn metrics, so none of these may be
+# imported when a party process starts
+FORBIDDEN_AT_STARTUP = ["matplotlib", "sklearn", "scipy"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure_once(module):
+    """Return a list of (module, self_us, cumulative_us, depth) for one cold import."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = APP_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        raise RuntimeError(f"Importing '{module}' failed with return code {result.returncode}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the party process")
+    parser.add_argument("--module", default="mpyc_task", help="Module to import, default to mpyc_task")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Cumulative import budget in ms")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest direct imports to show")
+    parser.add_argument("--runs", type=int, default=3, help="Runs to take the best time from")
+    args = parser.parse_args()
+
+    best_total_us = None
+    best_entries = None
+    for _ in range(args.runs):
+        entries = measure_once(args.module)
+        total_us = next(cumulative for name, _, cumulative, depth in entries if depth == 0 and name == args.module)
+        if best_total_us is None or total_us < best_total_us:
+            best_total_us, best_entries = total_us, entries
+
+    # Children are reported before their parent: the measured module's subtree
+    # is everything between the previous top-level entry and the module itself
+    end = next(i for i, (name, _, _, depth) in enumerate(best_entries) if depth == 0 and name == args.module)
+    start = end
+    while start > 0 and best_entries[start - 1][3] > 0:
+        start -= 1
+    subtree = best_entries[start:end]
+
+    imported = {name for name, _, _, _ in subtree}
+    # Direct imports of the measured module, slowest first
+    top_level = sorted(
+        [(name, cumulative) for name, _, cumulative, depth in subtree if depth == 1],
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+    print(f"📦 Import of '{args.module}': {best_total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, cumulative in top_level[:args.top]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if best_total_us / 1000 > args.budget_ms:
+        failures.append(f"import time {best_total_us / 1000:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+    for package in FORBIDDEN_AT_STARTUP:
+        if any(name == package or name.startswith(package + ".") for name in imported):
+            failures.append(f"'{package}' is imported at startup but must be imported lazily")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+
+    print("✅ Import-time budget respected.")
+
+if __name__ == "__main__":
+    main()